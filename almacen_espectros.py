@@ -0,0 +1,229 @@
+"""
+ALMACÉN DE ESPECTROS EN DISCO
+Guarda el espectro calculado de cada archivo para reutilizarlo entre ejecuciones
+
+Cuando se re-filtra la misma grabación con otro --corte/--rango, la carga y la
+FFT completa son idénticas en cada ejecución. Este módulo las guarda una sola vez:
+- datos.npy: señal normalizada (mapeada en memoria al reutilizarse)
+- espectro.npy: X[k] = FFT{x[n]} (mapeado en memoria al reutilizarse)
+- meta.json: huella del archivo de entrada, fs, forma y último acceso
+
+Invalidación:
+- Por defecto se compara tamaño + fecha de modificación (mtime) del archivo
+- Con verificar_contenido=True se compara el hash SHA-256 del contenido
+  (sobrevive a copias o 'touch' que cambian el mtime sin cambiar los datos)
+
+Limpieza: si el almacén supera el límite en MB se eliminan las entradas
+con el acceso más antiguo (LRU). La entrada recién guardada nunca se elimina,
+y una entrada que por sí sola supera el límite no se guarda.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import numpy as np
+
+DIRECTORIO_POR_DEFECTO = 'resultados/cache_espectros'
+LIMITE_POR_DEFECTO_MB = 512.0
+VERSION_FORMATO = 1
+
+def huella_archivo(ruta_archivo, verificar_contenido=False):
+    """
+    Calcula la huella que identifica una versión concreta del archivo
+
+    Args:
+        ruta_archivo: Ruta del archivo .wav
+        verificar_contenido: Si True, incluye el hash SHA-256 del contenido
+
+    Returns:
+        dict: Tamaño, mtime y (opcional) hash del contenido
+    """
+    estado = os.stat(ruta_archivo)
+    huella = {
+        'tamano': estado.st_size,
+        'mtime_ns': estado.st_mtime_ns
+    }
+
+    if verificar_contenido:
+        sha = hashlib.sha256()
+        with open(ruta_archivo, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 20), b''):
+                sha.update(bloque)
+        huella['sha256'] = sha.hexdigest()
+
+    return huella
+
+def _huella_valida(guardada, actual):
+    """Compara huellas: por contenido si hay hash, si no por tamaño + mtime"""
+    if guardada.get('tamano') != actual['tamano']:
+        return False
+    if 'sha256' in actual:
+        return guardada.get('sha256') == actual['sha256']
+    return guardada.get('mtime_ns') == actual['mtime_ns']
+
+def _ruta_entrada(directorio, ruta_archivo):
+    """Carpeta del almacén asociada a un archivo de entrada"""
+    clave = hashlib.sha1(os.path.abspath(ruta_archivo).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(directorio, clave)
+
+def _leer_meta(carpeta):
+    """Lee meta.json de una entrada (None si no existe o está dañado)"""
+    try:
+        with open(os.path.join(carpeta, 'meta.json'), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _escribir_meta(carpeta, meta):
+    """Escribe meta.json de forma atómica (archivo temporal + reemplazo)"""
+    ruta_tmp = os.path.join(carpeta, 'meta.json.tmp')
+    with open(ruta_tmp, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(ruta_tmp, os.path.join(carpeta, 'meta.json'))
+
+def buscar_espectro(ruta_archivo, directorio=DIRECTORIO_POR_DEFECTO,
+                    verificar_contenido=False):
+    """
+    Busca un espectro guardado y válido para el archivo de entrada
+
+    Args:
+        ruta_archivo: Ruta del archivo .wav original
+        directorio: Carpeta del almacén
+        verificar_contenido: Validar por hash de contenido en lugar de mtime
+
+    Returns:
+        tuple (fs, datos, espectro) con arrays mapeados en memoria (solo lectura),
+        o None si no hay entrada válida
+    """
+    carpeta = _ruta_entrada(directorio, ruta_archivo)
+    meta = _leer_meta(carpeta)
+    if meta is None or meta.get('version') != VERSION_FORMATO:
+        return None
+
+    actual = huella_archivo(ruta_archivo, verificar_contenido)
+    if not _huella_valida(meta['huella'], actual):
+        # Entrada obsoleta: el archivo cambió desde que se guardó
+        shutil.rmtree(carpeta, ignore_errors=True)
+        return None
+
+    try:
+        datos = np.load(os.path.join(carpeta, 'datos.npy'), mmap_mode='r')
+        espectro = np.load(os.path.join(carpeta, 'espectro.npy'), mmap_mode='r')
+    except (OSError, ValueError):
+        shutil.rmtree(carpeta, ignore_errors=True)
+        return None
+
+    # Registrar acceso para la política LRU
+    meta['ultimo_acceso'] = time.time()
+    _escribir_meta(carpeta, meta)
+
+    return meta['fs'], datos, espectro
+
+def guardar_espectro(ruta_archivo, fs, datos, espectro,
+                     directorio=DIRECTORIO_POR_DEFECTO, verificar_contenido=False,
+                     limite_mb=LIMITE_POR_DEFECTO_MB):
+    """
+    Guarda la señal normalizada y su espectro para ejecuciones posteriores
+
+    Args:
+        ruta_archivo: Ruta del archivo .wav original
+        fs: Frecuencia de muestreo
+        datos: Señal normalizada (salida de cargar_audio)
+        espectro: FFT de la señal
+        directorio: Carpeta del almacén
+        verificar_contenido: Guardar también el hash del contenido
+        limite_mb: Tamaño máximo del almacén tras guardar
+
+    Returns:
+        bool: False si la entrada no cabe en el límite (no se guarda nada)
+    """
+    # Guardarla solo para borrarla al limpiar haría cada ejecución más lenta
+    if datos.nbytes + espectro.nbytes > limite_mb * 1024 * 1024:
+        return False
+
+    carpeta = _ruta_entrada(directorio, ruta_archivo)
+    os.makedirs(carpeta, exist_ok=True)
+
+    # Escribir arrays como .npy mapeados en memoria (sin copias intermedias)
+    for nombre, arreglo in (('datos', datos), ('espectro', espectro)):
+        ruta_tmp = os.path.join(carpeta, f'{nombre}.tmp.npy')
+        destino = np.lib.format.open_memmap(ruta_tmp, mode='w+',
+                                            dtype=arreglo.dtype, shape=arreglo.shape)
+        destino[...] = arreglo
+        destino.flush()
+        del destino
+        os.replace(ruta_tmp, os.path.join(carpeta, f'{nombre}.npy'))
+
+    # meta.json se escribe al final: su presencia marca la entrada como completa
+    meta = {
+        'version': VERSION_FORMATO,
+        'entrada': os.path.abspath(ruta_archivo),
+        'huella': huella_archivo(ruta_archivo, verificar_contenido),
+        'fs': int(fs),
+        'forma': list(datos.shape),
+        'dtype_espectro': str(espectro.dtype),
+        'ultimo_acceso': time.time()
+    }
+    _escribir_meta(carpeta, meta)
+
+    limpiar_almacen(directorio, limite_mb, conservar=carpeta)
+    return True
+
+def _tamano_carpeta(carpeta):
+    """Suma el tamaño en bytes de los archivos de una entrada"""
+    total = 0
+    for nombre in os.listdir(carpeta):
+        try:
+            total += os.path.getsize(os.path.join(carpeta, nombre))
+        except OSError:
+            pass
+    return total
+
+def limpiar_almacen(directorio=DIRECTORIO_POR_DEFECTO, limite_mb=LIMITE_POR_DEFECTO_MB,
+                    conservar=None):
+    """
+    Elimina entradas hasta que el almacén quede bajo el límite
+
+    Se eliminan primero las entradas incompletas (sin meta.json) y después
+    las de acceso más antiguo.
+
+    Args:
+        directorio: Carpeta del almacén
+        limite_mb: Tamaño máximo permitido en MB
+        conservar: Carpeta de una entrada que no debe eliminarse (la recién guardada)
+
+    Returns:
+        int: Número de entradas eliminadas
+    """
+    if not os.path.isdir(directorio):
+        return 0
+
+    entradas = []
+    eliminadas = 0
+    for nombre in os.listdir(directorio):
+        carpeta = os.path.join(directorio, nombre)
+        if not os.path.isdir(carpeta):
+            continue
+        meta = _leer_meta(carpeta)
+        if meta is None:
+            shutil.rmtree(carpeta, ignore_errors=True)
+            eliminadas += 1
+            continue
+        entradas.append((meta.get('ultimo_acceso', 0.0), _tamano_carpeta(carpeta), carpeta))
+
+    limite_bytes = limite_mb * 1024 * 1024
+    total = sum(tamano for _, tamano, _ in entradas)
+
+    # Más antiguo primero (LRU)
+    for _, tamano, carpeta in sorted(entradas):
+        if total <= limite_bytes:
+            break
+        if conservar is not None and os.path.samefile(carpeta, conservar):
+            continue
+        shutil.rmtree(carpeta, ignore_errors=True)
+        total -= tamano
+        eliminadas += 1
+
+    return eliminadas
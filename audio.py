@@ -14,6 +14,10 @@ import matplotlib.pyplot as plt
 from scipy.io import wavfile
 import os
 import sys
+import wave
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 def generar_audio_prueba():
     """
@@ -229,11 +233,176 @@ GENERACIÓN:
         f.write(contenido)
     print("[INFO] Archivo de licencia creado: datos/LICENCIA.txt")
 
+# =====================================================================
+# SÍNTESIS POR BLOQUES (audios largos, paralela y reproducible)
+# =====================================================================
+
+TIPOS_SENAL = ('pura', 'ruido_blanco', 'ruido_60hz', 'multifrecuencia')
+TAM_BLOQUE_SINTESIS = 1 << 18  # 262144 muestras (~6 s a 44.1 kHz)
+
+def _senoide(frecuencia, indices, fs):
+    """
+    sin(2πf·n/fs) calculado con el índice absoluto de muestra
+
+    La fase se reduce con (f·n mod fs) para conservar precisión en archivos
+    largos; como solo depende de n, continúa exacta entre bloques.
+    """
+    return np.sin(2 * np.pi * np.mod(frecuencia * indices, fs) / fs)
+
+def sintetizar_bloque(tipo, frecuencia, fs, inicio, num_muestras, semilla, indice_bloque,
+                      canales=1):
+    """
+    Genera un bloque de la señal de prueba sin depender de los demás bloques
+
+    Args:
+        tipo: 'pura', 'ruido_blanco', 'ruido_60hz' o 'multifrecuencia'
+        frecuencia: Frecuencia base en Hz
+        fs: Frecuencia de muestreo
+        inicio: Índice absoluto de la primera muestra del bloque
+        num_muestras: Muestras del bloque
+        semilla: Semilla global del archivo
+        indice_bloque: Número de bloque (selecciona su flujo aleatorio)
+        canales: Número de canales (el ruido es independiente por canal)
+
+    Returns:
+        Array float64 (num_muestras, canales), sin normalizar
+    """
+    indices = np.arange(inicio, inicio + num_muestras, dtype=np.float64)
+
+    # Mismas ecuaciones que generar_audio_prueba (señal pura ya normalizada a 1)
+    if tipo in ('pura', 'ruido_blanco'):
+        senal = _senoide(frecuencia, indices, fs)
+    elif tipo == 'ruido_60hz':
+        senal = _senoide(frecuencia, indices, fs) + 0.4 * _senoide(60.0, indices, fs)
+    elif tipo == 'multifrecuencia':
+        senal = (0.5 * _senoide(frecuencia, indices, fs)
+                 + 0.3 * _senoide(2 * frecuencia, indices, fs)
+                 + 0.2 * _senoide(3 * frecuencia, indices, fs))
+    else:
+        raise ValueError(f"Tipo de señal no válido: {tipo}")
+
+    senal = np.repeat(senal[:, None], canales, axis=1)
+
+    if tipo in ('ruido_blanco', 'multifrecuencia'):
+        # Flujo aleatorio propio del bloque: hijo indice_bloque de SeedSequence(semilla),
+        # igual que SeedSequence(semilla).spawn(n)[indice_bloque]
+        generador = np.random.default_rng(np.random.SeedSequence(semilla, spawn_key=(indice_bloque,)))
+        sigma = 0.3 if tipo == 'ruido_blanco' else 0.25
+        senal += sigma * generador.standard_normal((num_muestras, canales))
+
+    return senal
+
+def _maximo_bloque(argumentos):
+    """Máximo absoluto de un bloque (primera pasada, se ejecuta en otro proceso)"""
+    return float(np.max(np.abs(sintetizar_bloque(*argumentos))))
+
+def _bloque_int16(argumentos_y_maximo):
+    """Bloque normalizado y convertido a 16 bits (segunda pasada)"""
+    argumentos, maximo = argumentos_y_maximo
+    senal = sintetizar_bloque(*argumentos) / maximo
+    return np.int16(senal * 32767).astype('<i2').tobytes()
+
+def _mapear_acotado(ejecutor, funcion, elementos, en_vuelo):
+    """
+    Como ejecutor.map (resultados en orden) pero con a lo más en_vuelo tareas
+    pendientes, para que la memoria no crezca con la duración del archivo.
+    Sin ejecutor (un solo trabajador) se calcula en este mismo proceso.
+    """
+    if ejecutor is None:
+        yield from map(funcion, elementos)
+        return
+    pendientes = deque()
+    for elemento in elementos:
+        pendientes.append(ejecutor.submit(funcion, elemento))
+        if len(pendientes) >= en_vuelo:
+            yield pendientes.popleft().result()
+    while pendientes:
+        yield pendientes.popleft().result()
+
+def generar_audio_largo(ruta_archivo, tipo='ruido_blanco', frecuencia=440.0, duracion=3600.0,
+                        fs=44100, canales=1, semilla=0, trabajadores=None,
+                        tam_bloque=TAM_BLOQUE_SINTESIS):
+    """
+    Genera un .wav largo por bloques en varios procesos y lo escribe en streaming
+
+    El resultado es idéntico bit a bit sin importar el número de trabajadores:
+    los bloques tienen tamaño fijo, cada uno usa el índice absoluto de muestra
+    para las senoides y su propio flujo aleatorio (SeedSequence). La
+    normalización al máximo (como en generar_audio_prueba) usa dos pasadas:
+    primero el máximo de cada bloque, luego se regenera y se escribe.
+
+    Args:
+        ruta_archivo: Ruta del .wav de salida (16 bits PCM)
+        tipo: Ver TIPOS_SENAL
+        frecuencia: Frecuencia base en Hz
+        duracion: Duración en segundos
+        fs: Frecuencia de muestreo
+        canales: Número de canales
+        semilla: Semilla global
+        trabajadores: Procesos (None = núcleos disponibles, 1 = sin procesos extra)
+        tam_bloque: Muestras por bloque (fijo: define el resultado)
+
+    Returns:
+        dict: Muestras, bloques y máximo usado para normalizar
+    """
+    total = int(fs * duracion)
+    tareas = [(tipo, frecuencia, fs, inicio, min(tam_bloque, total - inicio), semilla, i, canales)
+              for i, inicio in enumerate(range(0, total, tam_bloque))]
+    trabajadores = trabajadores or os.cpu_count() or 1
+    en_vuelo = 2 * trabajadores
+
+    # Con un trabajador no se crean procesos (mismo resultado, sin copiar bloques)
+    ejecutor = ProcessPoolExecutor(max_workers=trabajadores) if trabajadores > 1 else None
+    try:
+        # Pasada 1: máximo global (solo viajan números entre procesos)
+        maximo = max(_mapear_acotado(ejecutor, _maximo_bloque, tareas, en_vuelo), default=0.0)
+        if maximo == 0:
+            maximo = 1.0
+
+        # Pasada 2: bloques en orden directo al archivo
+        with wave.open(ruta_archivo, 'wb') as archivo:
+            archivo.setnchannels(canales)
+            archivo.setsampwidth(2)
+            archivo.setframerate(int(fs))
+            for datos in _mapear_acotado(ejecutor, _bloque_int16,
+                                         ((t, maximo) for t in tareas), en_vuelo):
+                archivo.writeframes(datos)
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown()
+
+    return {'muestras': total, 'bloques': len(tareas), 'maximo': maximo}
+
 if __name__ == "__main__":
     # Crear estructura de carpetas necesaria
     os.makedirs('datos', exist_ok=True)
     os.makedirs('resultados/graficas', exist_ok=True)
     
-    # Ejecutar generación de audios
-    generar_audio_prueba()
-    crear_archivo_licencia()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Generador de audios de prueba')
+    parser.add_argument('--largo', type=str, default=None, metavar='RUTA',
+                       help='Generar un solo audio largo por bloques en esta ruta')
+    parser.add_argument('--tipo', type=str, default='ruido_blanco', choices=TIPOS_SENAL,
+                       help='Tipo de señal para --largo')
+    parser.add_argument('--frecuencia', type=float, default=440.0,
+                       help='Frecuencia base en Hz para --largo')
+    parser.add_argument('--duracion', type=float, default=3600.0,
+                       help='Duración en segundos para --largo')
+    parser.add_argument('--fs', type=int, default=44100,
+                       help='Frecuencia de muestreo para --largo')
+    parser.add_argument('--canales', type=int, default=1,
+                       help='Número de canales para --largo')
+    parser.add_argument('--semilla', type=int, default=0,
+                       help='Semilla (mismo valor = mismo archivo)')
+    parser.add_argument('--trabajadores', type=int, default=None,
+                       help='Procesos para --largo (no cambia el resultado)')
+    args = parser.parse_args()
+    
+    if args.largo:
+        print(f"Generando {args.largo}: {args.tipo}, {args.duracion} s, {args.canales} canal(es)...")
+        info = generar_audio_largo(args.largo, args.tipo, args.frecuencia, args.duracion,
+                                   args.fs, args.canales, args.semilla, args.trabajadores)
+        print(f"  Guardado: {args.largo} ({info['muestras']} muestras, {info['bloques']} bloques)")
+    else:
+        # Ejecutar generación de audios
+        generar_audio_prueba()
+        crear_archivo_licencia()
\ No newline at end of file
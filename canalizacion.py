@@ -0,0 +1,305 @@
+"""
+PROCESAMIENTO POR LOTES CON CANALIZACIÓN (PIPELINE)
+Solapa lectura, cómputo y escritura usando doble búfer
+
+En procesar.main las etapas son estrictamente secuenciales:
+    leer -> FFT/filtro/IFFT -> guardar -> siguiente archivo
+Con muchos archivos el CPU espera al disco y el disco espera a la FFT.
+
+Esta canalización usa tres etapas conectadas por colas acotadas:
+    [hilos lectores] --cola_entrada--> [hilo principal: DSP] --cola_salida--> [hilos escritores]
+- Los lectores cargan y decodifican el siguiente archivo mientras se filtra el actual
+- Los escritores normalizan, convierten a int16 y escriben el resultado anterior
+- La profundidad de las colas (2 = doble búfer) limita la memoria usada
+
+La lectura y escritura de archivos y scipy.fft liberan el GIL, por lo que
+los hilos sí se ejecutan en paralelo.
+"""
+
+import os
+import time
+import queue
+import argparse
+import threading
+
+import procesar
+
+_FIN = object()  # Marcador de fin de cola
+
+class EstadisticasEtapa:
+    """Acumula el tiempo ocupado de una etapa (segura entre hilos)"""
+
+    def __init__(self, nombre, hilos):
+        self.nombre = nombre
+        self.hilos = hilos
+        self.ocupado = 0.0
+        self.elementos = 0
+        self._candado = threading.Lock()
+
+    def registrar(self, segundos):
+        with self._candado:
+            self.ocupado += segundos
+            self.elementos += 1
+
+    def utilizacion(self, tiempo_total):
+        """Fracción del tiempo total en que los hilos de la etapa trabajaron"""
+        if tiempo_total <= 0:
+            return 0.0
+        return self.ocupado / (tiempo_total * self.hilos)
+
+def ejecutar_canalizacion(tareas, leer, calcular, escribir, profundidad=2,
+                          hilos_lectura=1, hilos_escritura=1, al_terminar=None):
+    """
+    Ejecuta leer -> calcular -> escribir sobre cada tarea con etapas solapadas
+
+    Args:
+        tareas: Lista de tareas (ej. rutas de archivo)
+        leer: Función(tarea) -> datos leídos (se ejecuta en hilos lectores)
+        calcular: Función(tarea, datos) -> resultado (hilo principal)
+        escribir: Función(tarea, resultado) -> None (hilos escritores)
+        profundidad: Tamaño máximo de cada cola (2 = doble búfer)
+        hilos_lectura: Número de hilos lectores
+        hilos_escritura: Número de hilos escritores
+        al_terminar: Función(tarea, error) llamada al completar cada tarea;
+                     error es None si tuvo éxito. Puede llamarse desde
+                     distintos hilos.
+
+    Returns:
+        dict: Errores por tarea, tiempo total y estadísticas por etapa
+    """
+    cola_tareas = queue.Queue()
+    for tarea in tareas:
+        cola_tareas.put(tarea)
+
+    cola_entrada = queue.Queue(maxsize=profundidad)
+    cola_salida = queue.Queue(maxsize=profundidad)
+
+    etapas = {
+        'lectura': EstadisticasEtapa('lectura', hilos_lectura),
+        'calculo': EstadisticasEtapa('calculo', 1),
+        'escritura': EstadisticasEtapa('escritura', hilos_escritura)
+    }
+    errores = {}
+    candado_errores = threading.Lock()
+
+    def notificar(tarea, error):
+        if error is not None:
+            with candado_errores:
+                errores[tarea] = error
+        if al_terminar is not None:
+            al_terminar(tarea, error)
+
+    def lector():
+        while True:
+            try:
+                tarea = cola_tareas.get_nowait()
+            except queue.Empty:
+                break
+            inicio = time.perf_counter()
+            try:
+                datos = leer(tarea)
+            except Exception as e:
+                etapas['lectura'].registrar(time.perf_counter() - inicio)
+                notificar(tarea, e)
+                continue
+            etapas['lectura'].registrar(time.perf_counter() - inicio)
+            cola_entrada.put((tarea, datos))
+        cola_entrada.put(_FIN)
+
+    def escritor():
+        while True:
+            elemento = cola_salida.get()
+            if elemento is _FIN:
+                break
+            tarea, resultado = elemento
+            del elemento
+            inicio = time.perf_counter()
+            try:
+                escribir(tarea, resultado)
+                error = None
+            except Exception as e:
+                error = e
+            del resultado  # No retener la salida mientras se espera la siguiente
+            etapas['escritura'].registrar(time.perf_counter() - inicio)
+            notificar(tarea, error)
+
+    inicio_total = time.perf_counter()
+
+    lectores = [threading.Thread(target=lector, daemon=True) for _ in range(hilos_lectura)]
+    escritores = [threading.Thread(target=escritor, daemon=True) for _ in range(hilos_escritura)]
+    for hilo in lectores + escritores:
+        hilo.start()
+
+    # Etapa de cómputo en el hilo principal
+    lectores_activos = hilos_lectura
+    while lectores_activos > 0:
+        elemento = cola_entrada.get()
+        if elemento is _FIN:
+            lectores_activos -= 1
+            continue
+        tarea, datos = elemento
+        del elemento  # Solo 'datos' debe mantener vivo el búfer de entrada
+        inicio = time.perf_counter()
+        try:
+            resultado = calcular(tarea, datos)
+        except Exception as e:
+            del datos
+            etapas['calculo'].registrar(time.perf_counter() - inicio)
+            notificar(tarea, e)
+            continue
+        del datos  # Liberar el búfer de entrada antes de esperar en la cola
+        etapas['calculo'].registrar(time.perf_counter() - inicio)
+        cola_salida.put((tarea, resultado))
+        del resultado  # Solo la cola debe retener la salida mientras se lee la siguiente
+
+    for _ in escritores:
+        cola_salida.put(_FIN)
+    for hilo in lectores + escritores:
+        hilo.join()
+
+    return {
+        'errores': errores,
+        'tiempo_total': time.perf_counter() - inicio_total,
+        'etapas': etapas
+    }
+
+def ejecutar_secuencial(tareas, leer, calcular, escribir, al_terminar=None):
+    """
+    Ejecuta las mismas etapas sin solapamiento (referencia para comparar)
+
+    Args y Returns: igual que ejecutar_canalizacion
+    """
+    etapas = {
+        'lectura': EstadisticasEtapa('lectura', 1),
+        'calculo': EstadisticasEtapa('calculo', 1),
+        'escritura': EstadisticasEtapa('escritura', 1)
+    }
+    errores = {}
+    inicio_total = time.perf_counter()
+
+    def medir(nombre, funcion, *argumentos):
+        inicio = time.perf_counter()
+        try:
+            return funcion(*argumentos)
+        finally:
+            etapas[nombre].registrar(time.perf_counter() - inicio)
+
+    for tarea in tareas:
+        error = None
+        try:
+            datos = medir('lectura', leer, tarea)
+            resultado = medir('calculo', calcular, tarea, datos)
+            medir('escritura', escribir, tarea, resultado)
+        except Exception as e:
+            error = e
+            errores[tarea] = e
+        if al_terminar is not None:
+            al_terminar(tarea, error)
+
+    return {
+        'errores': errores,
+        'tiempo_total': time.perf_counter() - inicio_total,
+        'etapas': etapas
+    }
+
+def crear_etapas_filtrado(salida_dir, tipo_filtro='pasa_bajas', frecuencia_corte=1000,
+                          rango_frecuencias=(500, 1500), ruta_salida=None):
+    """
+    Construye las funciones leer/calcular/escribir para filtrar archivos .wav
+
+    Args:
+        salida_dir: Carpeta donde se guardan los audios procesados
+        tipo_filtro: Tipo de filtro (ver procesar.crear_mascara_filtro)
+        frecuencia_corte: Frecuencia de corte para pasa_bajas/pasa_altas
+        rango_frecuencias: Tupla (min, max) para pasa_banda/notch
+        ruta_salida: Función(ruta_entrada) -> ruta de salida (opcional)
+
+    Returns:
+        tuple: (leer, calcular, escribir)
+    """
+    if ruta_salida is None:
+        def ruta_salida(ruta_entrada):
+            base = os.path.splitext(os.path.basename(ruta_entrada))[0]
+            return os.path.join(salida_dir, f'{base}_{tipo_filtro}.wav')
+
+    def leer(ruta_entrada):
+        return procesar.cargar_audio(ruta_entrada)
+
+    def calcular(ruta_entrada, datos):
+        fs, datos_audio = datos
+        resultado = procesar.filtrar_audio(datos_audio, fs, tipo_filtro,
+                                           frecuencia_corte, rango_frecuencias)
+        metricas = procesar.calcular_metricas(datos_audio, resultado['datos_filtrados'])
+        return fs, resultado['datos_filtrados'], metricas
+
+    def escribir(ruta_entrada, resultado):
+        fs, datos_filtrados, _ = resultado
+        procesar.guardar_audio(datos_filtrados, fs, ruta_salida(ruta_entrada))
+
+    return leer, calcular, escribir
+
+def imprimir_estadisticas(titulo, resultado, num_archivos):
+    """Imprime tiempo total y utilización de cada etapa"""
+    tiempo = resultado['tiempo_total']
+    print(f"\n{titulo}")
+    print(f"   • Tiempo total: {tiempo:.3f} s ({num_archivos / tiempo:.2f} archivos/s)")
+    for etapa in resultado['etapas'].values():
+        print(f"   • {etapa.nombre:<10} ocupado {etapa.ocupado:.3f} s | "
+              f"utilización {100 * etapa.utilizacion(tiempo):.1f}% "
+              f"({etapa.hilos} hilo(s), {etapa.elementos} elementos)")
+    if resultado['errores']:
+        print(f"   • Errores: {len(resultado['errores'])}")
+        for tarea, error in resultado['errores'].items():
+            print(f"     - {tarea}: {error}")
+
+def main():
+    """Filtra un lote de archivos con la canalización y reporta la utilización"""
+    parser = argparse.ArgumentParser(description='Denoising por lotes con E/S solapada')
+
+    parser.add_argument('--entradas', type=str, nargs='+', required=True,
+                       help='Archivos de audio de entrada')
+    parser.add_argument('--salida-dir', type=str, default='resultados/audios_procesados',
+                       help='Carpeta de salida')
+    parser.add_argument('--filtro', type=str, default='pasa_bajas',
+                       choices=['pasa_bajas', 'pasa_altas', 'pasa_banda', 'notch'],
+                       help='Tipo de filtro a aplicar')
+    parser.add_argument('--corte', type=float, default=1000.0,
+                       help='Frecuencia de corte para pasa_bajas/pasa_altas')
+    parser.add_argument('--rango', type=str, default='500-1500',
+                       help='Rango para pasa_banda/notch (formato: min-max)')
+    parser.add_argument('--profundidad', type=int, default=2,
+                       help='Tamaño de las colas entre etapas (2 = doble búfer)')
+    parser.add_argument('--lectores', type=int, default=1,
+                       help='Hilos de lectura/decodificación')
+    parser.add_argument('--escritores', type=int, default=1,
+                       help='Hilos de codificación/escritura')
+    parser.add_argument('--comparar', action='store_true',
+                       help='Ejecutar también en modo secuencial y comparar tiempos')
+
+    args = parser.parse_args()
+    os.makedirs(args.salida_dir, exist_ok=True)
+
+    leer, calcular, escribir = crear_etapas_filtrado(args.salida_dir, args.filtro, args.corte,
+                                                    procesar.parsear_rango(args.rango))
+
+    print("="*60)
+    print("DENOISING POR LOTES CON CANALIZACIÓN")
+    print("="*60)
+    print(f"Archivos: {len(args.entradas)} | Filtro: {args.filtro} | "
+          f"Profundidad: {args.profundidad} | Lectores: {args.lectores} | "
+          f"Escritores: {args.escritores}")
+
+    if args.comparar:
+        secuencial = ejecutar_secuencial(args.entradas, leer, calcular, escribir)
+        imprimir_estadisticas("[Secuencial]", secuencial, len(args.entradas))
+
+    canalizado = ejecutar_canalizacion(args.entradas, leer, calcular, escribir,
+                                       args.profundidad, args.lectores, args.escritores)
+    imprimir_estadisticas("[Canalizado]", canalizado, len(args.entradas))
+
+    if args.comparar and canalizado['tiempo_total'] > 0:
+        print(f"\nAceleración: {secuencial['tiempo_total'] / canalizado['tiempo_total']:.2f}x")
+    print("="*60)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+MÁSCARAS DE FILTRO Y ESCALAS DE AUDIO
+Funciones básicas compartidas por procesar.py y los módulos de procesamiento
+
+No importa ningún otro módulo del proyecto, así que procesamiento_bloques,
+planificador y perfiles_ruido pueden usarlas sin importar la interfaz de
+línea de comandos de procesar.py (y sin importaciones circulares).
+"""
+
+import numpy as np
+
+def escala_dtype(dtype):
+    """Factor de normalización a [-1, 1] igual al de procesar.cargar_audio"""
+    if dtype == np.int16:
+        return 32767.0
+    if dtype == np.int32:
+        return 2147483647.0
+    return 1.0
+
+def crear_mascara_filtro(frecuencias, tipo_filtro='pasa_bajas', 
+                        frecuencia_corte=1000, rango_frecuencias=(500, 1500)):
+    """
+    Crea una máscara para diferentes tipos de filtros
+    
+    Args:
+        frecuencias: Array de frecuencias
+        tipo_filtro: 'pasa_bajas', 'pasa_altas', 'pasa_banda', 'notch'
+        frecuencia_corte: Frecuencia de corte para pasa_bajas/pasa_altas
+        rango_frecuencias: Tupla (min, max) para pasa_banda/notch
+    
+    Returns:
+        mascara: Array de 1s y 0s
+    """
+    mascara = np.ones_like(frecuencias, dtype=float)
+    
+    if tipo_filtro == 'pasa_bajas':
+        # Conserva frecuencias bajas
+        mascara[np.abs(frecuencias) > frecuencia_corte] = 0.0
+    
+    elif tipo_filtro == 'pasa_altas':
+        # Conserva frecuencias altas
+        mascara[np.abs(frecuencias) < frecuencia_corte] = 0.0
+    
+    elif tipo_filtro == 'pasa_banda':
+        # Conserva solo un rango
+        min_freq, max_freq = rango_frecuencias
+        mascara[(np.abs(frecuencias) < min_freq) | (np.abs(frecuencias) > max_freq)] = 0.0
+    
+    elif tipo_filtro == 'notch':
+        # Elimina un rango específico
+        min_freq, max_freq = rango_frecuencias
+        mascara[(np.abs(frecuencias) >= min_freq) & (np.abs(frecuencias) <= max_freq)] = 0.0
+    
+    else:
+        raise ValueError(f"Tipo de filtro no válido: {tipo_filtro}")
+    
+    return mascara
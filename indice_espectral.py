@@ -0,0 +1,453 @@
+"""
+ÍNDICE ESPECTRAL DE UN CORPUS
+Resúmenes compactos por archivo y por trama para decidir qué filtro necesita cada audio
+
+Antes había que correr procesar.py --graficas y mirar cada gráfica. Este módulo
+recorre cada archivo por bloques (mapeado en memoria) y calcula, con una rfft
+por lote de tramas:
+
+- Energía relativa por banda (zumbido, graves, medios, agudos, muy agudos)
+- Planitud espectral: exp(mean(log P)) / mean(P)   (~1 ruido blanco, ~0 tonos)
+- Pico tonal dominante de cada trama
+- Por archivo: picos tonales del espectro promedio y prominencia de 50/60 Hz
+
+El índice es columnar: una carpeta con un .npy por columna (se abren con
+mmap_mode='r', así una consulta solo lee las columnas que usa) y un
+archivos.json con las rutas. Las columnas 'trama_*' tienen una fila por trama
+y 'trama_archivo' indica a qué archivo pertenece.
+
+Al reconstruir el índice en la misma carpeta, los archivos cuyo mtime no
+cambió reutilizan sus filas anteriores y solo se analizan los nuevos o
+modificados.
+
+Uso:
+    python indice_espectral.py --entradas datos/ --indice resultados/indice
+    python indice_espectral.py --indice resultados/indice --consulta zumbido
+    python indice_espectral.py --indice resultados/indice --procesar resultados/audios_procesados/auto
+"""
+
+import os
+import json
+import argparse
+
+import numpy as np
+from scipy.fft import rfft, rfftfreq
+
+import metricas
+import procesamiento_bloques
+import trabajos
+
+BANDAS = (0, 100, 500, 2000, 8000)  # Hz; la última banda llega hasta fs/2
+NOMBRES_BANDAS = ('zumbido', 'graves', 'medios', 'agudos', 'muy_agudos')
+FRECUENCIAS_ZUMBIDO = (50.0, 60.0)
+NUM_PICOS = 5
+TRAMAS_POR_LOTE = 64
+
+# Umbrales de la elección automática de filtro
+UMBRAL_ZUMBIDO_DB = 15.0      # Prominencia del pico de red sobre su entorno
+UMBRAL_ZUMBIDO_ENERGIA = 1e-4 # Fracción mínima de la energía total en el pico
+UMBRAL_PLANITUD = 0.02        # Planitud mediana a partir de la cual hay ruido de banda ancha
+
+def tam_trama_para(fs):
+    """Potencia de 2 con resolución de ~4 Hz (separa 50 de 60 Hz)"""
+    return int(2 ** np.ceil(np.log2(fs / 4)))
+
+def _resumir_tramas(tramas, frecuencias, inicios_bandas, ventana):
+    """
+    Características de un lote de tramas (una sola rfft para todo el lote)
+
+    Returns:
+        tuple: (potencia (T, K), energia_bandas (T, B), planitud (T,),
+                pico_frecuencia (T,), rms (T,))
+    """
+    potencia = np.abs(rfft(tramas * ventana, axis=-1)) ** 2
+    total = potencia.sum(axis=-1)
+
+    energia_bandas = np.add.reduceat(potencia, inicios_bandas, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        energia_bandas = np.where(total[:, None] > 0, energia_bandas / total[:, None], 0.0)
+        media_log = np.mean(np.log(potencia + 1e-20), axis=-1)
+        planitud = np.where(total > 0, np.exp(media_log) / np.mean(potencia, axis=-1), 0.0)
+
+    pico_frecuencia = frecuencias[np.argmax(potencia[:, 1:], axis=-1) + 1]
+    rms = np.sqrt(np.mean(tramas ** 2, axis=-1))
+    return potencia, energia_bandas, planitud, pico_frecuencia, rms
+
+def _prominencia_db(espectro_medio, frecuencias, f0, ancho=2.0, entorno=20.0):
+    """
+    Prominencia de la componente en f0 sobre la mediana de su entorno
+
+    Returns:
+        tuple: (prominencia en dB, fracción de la energía total en el pico)
+    """
+    resolucion = frecuencias[1]
+    ancho = max(ancho, 1.5 * resolucion)
+    distancia = np.abs(frecuencias - f0)
+    en_pico = distancia <= ancho
+    en_entorno = (distancia > ancho + resolucion) & (distancia <= entorno)
+    if not en_pico.any() or not en_entorno.any():
+        return 0.0, 0.0
+
+    pico = espectro_medio[en_pico].max()
+    piso = np.median(espectro_medio[en_entorno]) + 1e-20
+    fraccion = espectro_medio[en_pico].sum() / (espectro_medio.sum() + 1e-20)
+    return float(10 * np.log10(pico / piso + 1e-20)), float(fraccion)
+
+def _picos_tonales(espectro_medio, frecuencias, num_picos=NUM_PICOS):
+    """
+    Máximos locales más fuertes del espectro promedio
+
+    Returns:
+        tuple: (frecuencias (num_picos,), niveles en dB sobre la mediana (num_picos,))
+    """
+    es_maximo = np.zeros(len(espectro_medio), dtype=bool)
+    es_maximo[1:-1] = ((espectro_medio[1:-1] > espectro_medio[:-2]) &
+                       (espectro_medio[1:-1] >= espectro_medio[2:]))
+    indices = np.flatnonzero(es_maximo)
+    indices = indices[np.argsort(espectro_medio[indices])[::-1][:num_picos]]
+
+    piso = np.median(espectro_medio) + 1e-20
+    freq = np.full(num_picos, np.nan, dtype=np.float32)
+    nivel = np.full(num_picos, np.nan, dtype=np.float32)
+    freq[:len(indices)] = frecuencias[indices]
+    nivel[:len(indices)] = 10 * np.log10(espectro_medio[indices] / piso + 1e-20)
+    return freq, nivel
+
+def analizar_archivo(ruta_archivo):
+    """
+    Calcula el resumen por archivo y por trama recorriendo el audio por lotes
+
+    Args:
+        ruta_archivo: Ruta del .wav
+
+    Returns:
+        tuple: (resumen del archivo (dict), columnas por trama (dict de arrays))
+    """
+    fs, datos, escala = procesamiento_bloques.abrir_audio_mapeado(ruta_archivo)
+    L = tam_trama_para(fs)
+    frecuencias = rfftfreq(L, 1/fs)
+    bordes = [b for b in BANDAS if b < fs / 2]
+    inicios_bandas = np.searchsorted(frecuencias, bordes)
+    ventana = np.hanning(L)
+
+    espectro_acumulado = np.zeros(len(frecuencias))
+    columnas = {'energia_bandas': [], 'planitud': [], 'pico_frecuencia': [], 'rms': []}
+
+    # Lotes alineados a tramas: cada lote se enmarca sin copiar (vista con strides)
+    muestras_lote = L * TRAMAS_POR_LOTE
+    for inicio in range(0, max(len(datos) - L + 1, 1), muestras_lote):
+        bloque = np.asarray(datos[inicio:inicio + muestras_lote], dtype=np.float64) / escala
+        if bloque.ndim > 1:
+            bloque = bloque.mean(axis=1)  # Mezcla a mono para el análisis
+        if len(bloque) < L:
+            bloque = np.pad(bloque, (0, L - len(bloque)))
+        tramas = metricas.enmarcar(bloque, L, L)
+
+        potencia, energia_bandas, planitud, pico, rms = _resumir_tramas(
+            tramas, frecuencias, inicios_bandas, ventana)
+        espectro_acumulado += potencia.sum(axis=0)
+        columnas['energia_bandas'].append(energia_bandas)
+        columnas['planitud'].append(planitud)
+        columnas['pico_frecuencia'].append(pico)
+        columnas['rms'].append(rms)
+
+    columnas = {k: np.concatenate(v).astype(np.float32) for k, v in columnas.items()}
+    num_tramas = len(columnas['rms'])
+    columnas['tiempo'] = (np.arange(num_tramas) * L / fs).astype(np.float32)
+    espectro_medio = espectro_acumulado / max(num_tramas, 1)
+
+    # Bandas por encima de fs/2 no existen: rellenar con ceros
+    faltan = len(BANDAS) - columnas['energia_bandas'].shape[1]
+    if faltan:
+        columnas['energia_bandas'] = np.pad(columnas['energia_bandas'], ((0, 0), (0, faltan)))
+
+    zumbido = [_prominencia_db(espectro_medio, frecuencias, f0) for f0 in FRECUENCIAS_ZUMBIDO]
+    picos_freq, picos_db = _picos_tonales(espectro_medio, frecuencias)
+
+    # Los archivos más cortos que una trama se analizan con relleno de ceros
+    energia_media = np.average(columnas['energia_bandas'], axis=0,
+                               weights=columnas['rms'] ** 2 + 1e-20)
+    resumen = {
+        'fs': int(fs),
+        'duracion': len(datos) / fs,
+        'energia_bandas': energia_media.astype(np.float32),
+        'planitud': float(np.median(columnas['planitud'])),
+        'zumbido_db': np.array([z[0] for z in zumbido], dtype=np.float32),
+        'zumbido_fraccion': np.array([z[1] for z in zumbido], dtype=np.float32),
+        'picos_frecuencia': picos_freq,
+        'picos_db': picos_db
+    }
+    return resumen, columnas
+
+def _cargar_previos(carpeta_indice):
+    """
+    Filas del índice ya guardado en la carpeta, por ruta de archivo
+
+    Returns:
+        dict: ruta -> (mtime, resumen, columnas por trama), copiados a memoria
+              porque los .npy se sobrescriben al guardar el índice nuevo
+    """
+    try:
+        with open(os.path.join(carpeta_indice, 'archivos.json'), 'r') as f:
+            catalogo = json.load(f)
+        indice = cargar_indice(carpeta_indice)
+    except (OSError, ValueError):
+        return {}
+    if (catalogo['bandas'] != list(BANDAS)
+            or catalogo['frecuencias_zumbido'] != list(FRECUENCIAS_ZUMBIDO)
+            or not catalogo['archivos']):
+        return {}
+
+    nombres_archivo = [n for n, v in indice.items()
+                       if isinstance(v, np.ndarray) and not n.startswith('trama_')]
+    nombres_trama = [n for n in indice if n.startswith('trama_') and n != 'trama_archivo']
+    limites = np.searchsorted(indice['trama_archivo'], np.arange(len(catalogo['archivos']) + 1))
+
+    previos = {}
+    for i, entrada in enumerate(catalogo['archivos']):
+        resumen = {n: np.array(indice[n][i]) for n in nombres_archivo}
+        columnas = {n[len('trama_'):]: np.array(indice[n][limites[i]:limites[i + 1]])
+                    for n in nombres_trama}
+        previos[entrada['ruta']] = (entrada['mtime'], resumen, columnas)
+    return previos
+
+def construir_indice(archivos, carpeta_indice):
+    """
+    Analiza los archivos nuevos o modificados y guarda el índice columnar
+
+    Args:
+        archivos: Lista de rutas .wav
+        carpeta_indice: Carpeta de salida del índice
+
+    Returns:
+        dict: Índice cargado (ver cargar_indice)
+    """
+    os.makedirs(carpeta_indice, exist_ok=True)
+    previos = _cargar_previos(carpeta_indice)
+
+    por_archivo = {}
+    por_trama = {}
+    catalogo = []
+    errores = {}
+    for ruta in archivos:
+        try:
+            mtime = os.path.getmtime(ruta)
+            if ruta in previos and previos[ruta][0] == mtime:
+                _, resumen, columnas = previos[ruta]
+                estado = 'sin cambios'
+            else:
+                resumen, columnas = analizar_archivo(ruta)
+                estado = 'OK'
+        except Exception as e:
+            errores[ruta] = str(e)
+            print(f"  ERROR {ruta}: {e}")
+            continue
+
+        indice_archivo = len(catalogo)
+        catalogo.append({'ruta': ruta, 'mtime': mtime})
+        for nombre, valor in resumen.items():
+            por_archivo.setdefault(nombre, []).append(valor)
+        for nombre, valor in columnas.items():
+            por_trama.setdefault(nombre, []).append(valor)
+        por_trama.setdefault('archivo', []).append(
+            np.full(len(columnas['rms']), indice_archivo, dtype=np.int32))
+        print(f"  {estado} {ruta} ({len(columnas['rms'])} tramas)")
+
+    # Quitar el índice anterior: sin archivos.json queda marcado como incompleto
+    # y ninguna columna vieja sobrevive si esta vez no se genera
+    ruta_catalogo = os.path.join(carpeta_indice, 'archivos.json')
+    if os.path.exists(ruta_catalogo):
+        os.remove(ruta_catalogo)
+    for nombre in os.listdir(carpeta_indice):
+        if nombre.endswith('.npy'):
+            os.remove(os.path.join(carpeta_indice, nombre))
+
+    for nombre, valores in por_archivo.items():
+        np.save(os.path.join(carpeta_indice, f'{nombre}.npy'), np.array(valores))
+    for nombre, valores in por_trama.items():
+        np.save(os.path.join(carpeta_indice, f'trama_{nombre}.npy'), np.concatenate(valores))
+
+    with open(ruta_catalogo, 'w') as f:
+        json.dump({'bandas': list(BANDAS), 'nombres_bandas': list(NOMBRES_BANDAS),
+                   'frecuencias_zumbido': list(FRECUENCIAS_ZUMBIDO),
+                   'archivos': catalogo, 'errores': errores}, f, indent=1)
+
+    return cargar_indice(carpeta_indice)
+
+def cargar_indice(carpeta_indice):
+    """
+    Abre un índice guardado (las columnas se mapean en memoria)
+
+    Args:
+        carpeta_indice: Carpeta del índice
+
+    Returns:
+        dict: 'archivos' (lista de rutas), metadatos y una entrada por columna
+    """
+    with open(os.path.join(carpeta_indice, 'archivos.json'), 'r') as f:
+        catalogo = json.load(f)
+
+    indice = {
+        'archivos': [a['ruta'] for a in catalogo['archivos']],
+        'bandas': catalogo['bandas'],
+        'nombres_bandas': catalogo['nombres_bandas'],
+        'frecuencias_zumbido': catalogo['frecuencias_zumbido']
+    }
+    for nombre in os.listdir(carpeta_indice):
+        if nombre.endswith('.npy'):
+            indice[nombre[:-4]] = np.load(os.path.join(carpeta_indice, nombre), mmap_mode='r')
+    return indice
+
+def _columna(indice, nombre):
+    """Columna por archivo (array vacío si el índice no tiene archivos)"""
+    return np.asarray(indice[nombre]) if nombre in indice else np.zeros((0,))
+
+def con_zumbido(indice, umbral_db=UMBRAL_ZUMBIDO_DB, fraccion_min=UMBRAL_ZUMBIDO_ENERGIA):
+    """
+    Máscara de archivos con componente fuerte de 50 o 60 Hz
+
+    Returns:
+        Array booleano (num_archivos,)
+    """
+    zumbido_db = _columna(indice, 'zumbido_db')
+    if zumbido_db.size == 0:
+        return np.zeros(0, dtype=bool)
+    fraccion = _columna(indice, 'zumbido_fraccion')
+    return np.any((zumbido_db >= umbral_db) & (fraccion >= fraccion_min), axis=-1)
+
+def con_ruido_banda_ancha(indice, umbral=UMBRAL_PLANITUD):
+    """Máscara de archivos cuya planitud espectral indica ruido de banda ancha"""
+    return _columna(indice, 'planitud') >= umbral
+
+def consultar(indice, consulta):
+    """
+    Rutas de los archivos que cumplen una consulta
+
+    Args:
+        indice: Índice cargado
+        consulta: 'zumbido', 'ruido_banda_ancha' o 'limpio'
+
+    Returns:
+        list: Rutas
+    """
+    zumbido = con_zumbido(indice)
+    banda_ancha = con_ruido_banda_ancha(indice)
+    mascaras = {
+        'zumbido': zumbido,
+        'ruido_banda_ancha': banda_ancha,
+        'limpio': ~zumbido & ~banda_ancha
+    }
+    if consulta not in mascaras:
+        raise ValueError(f"Consulta no válida: {consulta}")
+    return [indice['archivos'][i] for i in np.flatnonzero(mascaras[consulta])]
+
+def elegir_filtro(indice, i):
+    """
+    Elige el filtro para el archivo i del índice
+
+    - Zumbido de red: notch de ±5 Hz alrededor de 50 o 60 Hz
+    - Ruido de banda ancha: pasa-bajas por encima del pico tonal más alto
+      (redondeado a 100 Hz, mínimo 500 Hz)
+    - Limpio: None
+
+    Returns:
+        tuple (tipo_filtro, frecuencia_corte, rango_frecuencias) o None
+    """
+    zumbido_db = np.asarray(indice['zumbido_db'][i])
+    fraccion = np.asarray(indice['zumbido_fraccion'][i])
+    candidatos = (zumbido_db >= UMBRAL_ZUMBIDO_DB) & (fraccion >= UMBRAL_ZUMBIDO_ENERGIA)
+    if candidatos.any():
+        f0 = indice['frecuencias_zumbido'][int(np.argmax(np.where(candidatos, zumbido_db, -np.inf)))]
+        return ('notch', 1000.0, (f0 - 5, f0 + 5))
+
+    if indice['planitud'][i] >= UMBRAL_PLANITUD:
+        picos = np.asarray(indice['picos_frecuencia'][i])
+        niveles = np.asarray(indice['picos_db'][i])
+        significativos = picos[np.nan_to_num(niveles) >= UMBRAL_ZUMBIDO_DB]
+        mayor = significativos.max() if significativos.size else 0.0
+        corte = max(500.0, float(np.ceil(1.2 * mayor / 100) * 100))
+        return ('pasa_bajas', corte, (500, 1500))
+
+    return None
+
+def agrupar_por_filtro(indice):
+    """
+    Agrupa los archivos del índice según el filtro elegido automáticamente
+
+    Returns:
+        dict: {(tipo_filtro, corte, rango) o None: [rutas]}
+    """
+    grupos = {}
+    for i, ruta in enumerate(indice['archivos']):
+        grupos.setdefault(elegir_filtro(indice, i), []).append(ruta)
+    return grupos
+
+def etiqueta_filtro(filtro):
+    """Texto corto para un filtro elegido (también se usa como nombre de carpeta)"""
+    if filtro is None:
+        return 'limpio'
+    if filtro[0] == 'notch':
+        return f"notch_{filtro[2][0]:.0f}_{filtro[2][1]:.0f}Hz"
+    return f"{filtro[0]}_{filtro[1]:.0f}Hz"
+
+def procesar_con_filtro_automatico(indice, salida_dir, reintentos=2):
+    """
+    Ejecuta trabajos.ejecutar_trabajo una vez por cada grupo de filtro
+
+    Cada grupo usa su propia carpeta (y manifiesto) dentro de salida_dir, así
+    un trabajo interrumpido se reanuda igual que con trabajos.py. Los archivos
+    limpios no se procesan.
+
+    Returns:
+        dict: {etiqueta: Manifiesto}
+    """
+    manifiestos = {}
+    for filtro, archivos in agrupar_por_filtro(indice).items():
+        etiqueta = etiqueta_filtro(filtro)
+        if filtro is None:
+            print(f"\n[{etiqueta}] {len(archivos)} archivo(s) sin filtrar")
+            continue
+        print(f"\n[{etiqueta}] {len(archivos)} archivo(s)")
+        tipo_filtro, corte, rango = filtro
+        manifiestos[etiqueta] = trabajos.ejecutar_trabajo(
+            archivos, os.path.join(salida_dir, etiqueta), tipo_filtro, corte, rango, reintentos)
+    return manifiestos
+
+def main():
+    """Construye o consulta el índice espectral"""
+    parser = argparse.ArgumentParser(description='Índice espectral para clasificar el ruido de un corpus')
+
+    parser.add_argument('--entradas', type=str, nargs='+', default=None,
+                       help='Archivos, carpetas o patrones glob a indexar')
+    parser.add_argument('--indice', type=str, default='resultados/indice',
+                       help='Carpeta del índice')
+    parser.add_argument('--consulta', type=str, default=None,
+                       choices=['zumbido', 'ruido_banda_ancha', 'limpio'],
+                       help='Listar archivos que cumplen la consulta')
+    parser.add_argument('--procesar', type=str, default=None, metavar='SALIDA_DIR',
+                       help='Filtrar cada archivo con el filtro sugerido (trabajo reanudable)')
+
+    args = parser.parse_args()
+
+    if args.entradas:
+        archivos = trabajos.buscar_archivos(args.entradas)
+        print(f"Indexando {len(archivos)} archivo(s) en {args.indice}...")
+        indice = construir_indice(archivos, args.indice)
+    else:
+        indice = cargar_indice(args.indice)
+
+    if args.consulta:
+        for ruta in consultar(indice, args.consulta):
+            print(ruta)
+        return
+
+    print(f"\n{'Archivo':<45} {'Planitud':>9} {'50Hz dB':>8} {'60Hz dB':>8}  Filtro sugerido")
+    for i, ruta in enumerate(indice['archivos']):
+        print(f"{ruta:<45} {indice['planitud'][i]:>9.4f} {indice['zumbido_db'][i][0]:>8.1f} "
+              f"{indice['zumbido_db'][i][1]:>8.1f}  {etiqueta_filtro(elegir_filtro(indice, i))}")
+
+    if args.procesar:
+        procesar_con_filtro_automatico(indice, args.procesar)
+
+if __name__ == "__main__":
+    main()
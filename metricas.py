@@ -0,0 +1,240 @@
+"""
+MÉTRICAS DE CALIDAD SEGMENTALES Y ESPECTRALES
+Evalúa el denoising por tramas y por bandas en una sola pasada vectorizada
+
+calcular_metricas (procesar.py) da MSE, SNR y PSNR globales. Un SNR referido
+a la señal procesada premiaría filtrar de más, así que aquí (y en
+calcular_metricas) la referencia es siempre la señal original:
+
+- SNR segmental: promedio por tramas de 10·log10(Σx² / Σ(x - y)²),
+  limitado a [-10, 35] dB para que las tramas de silencio no dominen
+- Distancia log-espectral (LSD): sqrt(mean((10·log10 Px - 10·log10 Py)²)) en dB
+- Retención de energía por banda: Σ|Y[k]|² / Σ|X[k]|² dentro de cada banda
+
+Las tramas son vistas con strides (sliding_window_view), sin copiar la señal;
+la LSD segmental procesa las tramas por lotes (TRAMAS_POR_LOTE) para que sus
+rfft no ocupen memoria proporcional a la duración.
+Todas las funciones aceptan lotes: arrays (..., N) se evalúan de una vez, útil
+para comparar muchas salidas de un barrido de filtros contra el mismo original.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import fft, rfft, fftfreq
+
+BANDAS_POR_DEFECTO = (0, 125, 250, 500, 1000, 2000, 4000, 8000, 16000)
+SNR_SEGMENTAL_MIN = -10.0
+SNR_SEGMENTAL_MAX = 35.0
+PISO_DB = -100.0  # Piso para el logaritmo de la potencia (relativo al máximo)
+TRAMAS_POR_LOTE = 256
+
+def enmarcar(senal, longitud_trama=1024, salto=512):
+    """
+    Divide la señal en tramas solapadas sin copiar datos
+
+    Args:
+        senal: Array (..., N)
+        longitud_trama: Muestras por trama
+        salto: Muestras entre inicios de tramas consecutivas
+
+    Returns:
+        Vista de solo lectura (..., num_tramas, longitud_trama)
+    """
+    senal = np.asarray(senal)
+    longitud_trama = min(longitud_trama, senal.shape[-1])
+    return sliding_window_view(senal, longitud_trama, axis=-1)[..., ::salto, :]
+
+def _energia_tramas(tramas):
+    """Σ x² por trama sin crear el array de cuadrados"""
+    return np.einsum('...j,...j->...', tramas, tramas)
+
+def snr_segmental(original, procesada, longitud_trama=1024, salto=512):
+    """
+    SNR segmental con la señal original como referencia
+
+    Args:
+        original: Señal original (N,)
+        procesada: Señal(es) procesada(s) (..., N)
+        longitud_trama, salto: Ver enmarcar
+
+    Returns:
+        tuple: (snr_seg_db (...,), snr_por_trama_db (..., num_tramas))
+    """
+    original, procesada = _igualar_longitud(original, procesada)
+    error = original - procesada
+
+    energia_senal = _energia_tramas(enmarcar(original, longitud_trama, salto))
+    energia_error = _energia_tramas(enmarcar(error, longitud_trama, salto))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        snr_tramas = 10 * np.log10(energia_senal / energia_error)
+    snr_tramas = np.clip(np.nan_to_num(snr_tramas, nan=SNR_SEGMENTAL_MAX,
+                                       posinf=SNR_SEGMENTAL_MAX, neginf=SNR_SEGMENTAL_MIN),
+                         SNR_SEGMENTAL_MIN, SNR_SEGMENTAL_MAX)
+
+    return snr_tramas.mean(axis=-1), snr_tramas
+
+def _potencia_db(potencia, referencia):
+    """10·log10 de la potencia con piso relativo a la referencia"""
+    piso = referencia * 10 ** (PISO_DB / 10) + np.finfo(float).tiny
+    return 10 * np.log10(np.maximum(potencia, piso))
+
+def distancia_log_espectral(espectro_original, espectro_procesado):
+    """
+    Distancia log-espectral entre espectros (eje de frecuencia = último eje)
+
+    Args:
+        espectro_original: Espectro complejo de referencia (..., K)
+        espectro_procesado: Espectro(s) complejo(s) a comparar (..., K)
+
+    Returns:
+        LSD en dB con forma (...)
+    """
+    potencia_o = np.abs(espectro_original) ** 2
+    potencia_p = np.abs(espectro_procesado) ** 2
+    referencia = potencia_o.max(axis=-1, keepdims=True)
+
+    diferencia = _potencia_db(potencia_o, referencia) - _potencia_db(potencia_p, referencia)
+    return np.sqrt(np.mean(diferencia ** 2, axis=-1))
+
+def distancia_log_espectral_segmental(original, procesada, longitud_trama=1024, salto=512):
+    """
+    LSD por tramas (ventana de Hann), con una rfft por lote de TRAMAS_POR_LOTE tramas
+
+    Args:
+        original: Señal original (N,)
+        procesada: Señal(es) procesada(s) (..., N)
+        longitud_trama, salto: Ver enmarcar
+
+    Returns:
+        tuple: (lsd_media_db (...,), lsd_por_trama_db (..., num_tramas))
+    """
+    original, procesada = _igualar_longitud(original, procesada)
+    tramas_o = enmarcar(original, longitud_trama, salto)
+    tramas_p = enmarcar(procesada, longitud_trama, salto)
+    ventana = np.hanning(tramas_o.shape[-1])
+
+    num_tramas = tramas_o.shape[-2]
+    lsd_tramas = np.empty(np.broadcast_shapes(tramas_o.shape[:-1], tramas_p.shape[:-1]))
+    for inicio in range(0, num_tramas, TRAMAS_POR_LOTE):
+        lote = slice(inicio, inicio + TRAMAS_POR_LOTE)
+        lsd_tramas[..., lote] = distancia_log_espectral(
+            rfft(tramas_o[..., lote, :] * ventana, axis=-1),
+            rfft(tramas_p[..., lote, :] * ventana, axis=-1))
+    return lsd_tramas.mean(axis=-1), lsd_tramas
+
+def retencion_por_banda(espectro_original, espectro_procesado, frecuencias,
+                        bandas=BANDAS_POR_DEFECTO):
+    """
+    Fracción de la energía original que conserva cada banda
+
+    Args:
+        espectro_original: Espectro de referencia (..., K)
+        espectro_procesado: Espectro(s) procesado(s) (..., K)
+        frecuencias: Eje de frecuencias (K,) en el orden de fftfreq o rfftfreq
+        bandas: Bordes de las bandas en Hz (crecientes)
+
+    Returns:
+        tuple: (retencion (..., num_bandas), bordes usados (num_bandas + 1,))
+    """
+    frecuencias = np.asarray(frecuencias)
+    fmax = np.abs(frecuencias).max()
+    bordes = np.array([b for b in bandas if b < fmax] + [fmax + 1e-9], dtype=float)
+
+    # Solo frecuencias no negativas (el espectro de una señal real es simétrico)
+    positivas = frecuencias >= 0
+    orden = np.argsort(frecuencias[positivas], kind='stable')
+    indices = np.flatnonzero(positivas)[orden]
+    inicios = np.searchsorted(frecuencias[indices], bordes[:-1], side='left')
+
+    vacias = np.append(inicios[1:] == inicios[:-1], inicios[-1] >= len(indices))
+    inicios = np.minimum(inicios, len(indices) - 1)
+
+    potencia_o = np.abs(espectro_original[..., indices]) ** 2
+    potencia_p = np.abs(espectro_procesado[..., indices]) ** 2
+
+    # Suma por banda en una sola reducción (bandas vacías quedan en 0)
+    energia_o = np.add.reduceat(potencia_o, inicios, axis=-1)
+    energia_p = np.add.reduceat(potencia_p, inicios, axis=-1)
+    energia_o[..., vacias] = 0.0
+    energia_p[..., vacias] = 0.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        retencion = np.where(energia_o > 0, energia_p / energia_o, np.nan)
+    return retencion, bordes
+
+def _igualar_longitud(original, procesada):
+    """Recorta ambas señales a la longitud común (como calcular_metricas)"""
+    original = np.asarray(original)
+    procesada = np.asarray(procesada)
+    n = min(original.shape[-1], procesada.shape[-1])
+    return original[..., :n], procesada[..., :n]
+
+def evaluar(original, procesada, fs, espectro_original=None, espectro_procesado=None,
+            longitud_trama=1024, salto=512, bandas=BANDAS_POR_DEFECTO):
+    """
+    Calcula todas las métricas en una pasada (acepta lotes de señales procesadas)
+
+    Si el pipeline ya tiene los espectros completos (fft de longitud N),
+    se reutilizan para la LSD global y la retención por banda.
+
+    Args:
+        original: Señal original (N,)
+        procesada: Señal procesada (N,) o lote de señales (B, N)
+        fs: Frecuencia de muestreo
+        espectro_original: fft(original) ya calculada (opcional)
+        espectro_procesado: fft(procesada) ya calculada (opcional, misma forma)
+        longitud_trama, salto: Parámetros de las tramas
+        bandas: Bordes de bandas en Hz
+
+    Returns:
+        dict: Métricas globales (forma (...)) y por trama / por banda
+    """
+    original, procesada = _igualar_longitud(original, procesada)
+    N = original.shape[-1]
+
+    if espectro_original is None or espectro_original.shape[-1] != N:
+        espectro_original = fft(original)
+    if espectro_procesado is None or espectro_procesado.shape[-1] != N:
+        espectro_procesado = fft(procesada, axis=-1)
+    frecuencias = fftfreq(N, 1/fs)
+
+    error = original - procesada
+    mse = _energia_tramas(error) / N
+    del error  # snr_segmental calcula el suyo; no tener dos vivos a la vez
+    potencia_original = _energia_tramas(original) / N
+    with np.errstate(divide='ignore'):
+        snr = 10 * np.log10(potencia_original / mse)
+
+    snr_seg, snr_tramas = snr_segmental(original, procesada, longitud_trama, salto)
+    lsd_seg, lsd_tramas = distancia_log_espectral_segmental(original, procesada,
+                                                           longitud_trama, salto)
+    retencion, bordes = retencion_por_banda(espectro_original, espectro_procesado,
+                                            frecuencias, bandas)
+
+    return {
+        'mse': mse,
+        'snr_db': snr,
+        'snr_segmental_db': snr_seg,
+        'snr_por_trama_db': snr_tramas,
+        'lsd_db': distancia_log_espectral(espectro_original, espectro_procesado),
+        'lsd_segmental_db': lsd_seg,
+        'lsd_por_trama_db': lsd_tramas,
+        'retencion_bandas': retencion,
+        'bordes_bandas': bordes
+    }
+
+def evaluar_lote(original, procesadas, fs, **opciones):
+    """
+    Evalúa muchas salidas contra el mismo original (barridos de filtros)
+
+    Args:
+        original: Señal original (N,)
+        procesadas: Lista o array (B, N) de señales procesadas
+        fs: Frecuencia de muestreo
+        **opciones: Ver evaluar
+
+    Returns:
+        dict: Métricas con primera dimensión B
+    """
+    return evaluar(original, np.stack([np.asarray(p) for p in procesadas]), fs, **opciones)
@@ -0,0 +1,356 @@
+"""
+BIBLIOTECA DE PERFILES DE RUIDO
+Aprende el ruido de un equipo una vez y lo reutiliza en otros archivos y streams
+
+Un perfil es compacto e independiente de la duración del audio:
+- Densidad espectral de potencia S(f) promediada (Welch) con nfft fijo
+- Picos tonales (ej. zumbido de 60 Hz y armónicos) sobre la mediana local
+
+Se aprende de un clip con solo ruido o de las tramas más silenciosas de una
+grabación (fraccion_silencio). El perfil se guarda en unidades de escala
+completa (PCM / 32767, sin normalizar al máximo) porque procesar.cargar_audio
+normaliza cada archivo a su propio pico; al aplicarlo se corrige con el factor
+de normalización del archivo destino (nivel_normalizacion). Para aplicarlo a un espectro de cualquier
+longitud y frecuencia de muestreo, S(f) se interpola en Hz y se convierte a
+la potencia esperada por bin:
+
+    E|N[k]|² = S(f_k) · fs · Σw² / 2        (w = ventana usada en esa FFT)
+
+Ganancia por resta espectral de potencia (con piso para evitar ruido musical):
+
+    G[k] = sqrt(max(1 - α·E|N[k]|² / |X[k]|², β²))
+
+y G = β en los bins de los picos tonales del perfil.
+
+Uso:
+    python perfiles_ruido.py --entrada ruido_equipo1.wav --perfil perfiles/equipo1.npz
+    python procesar.py --entrada grabacion.wav --filtro perfil --perfil-ruido perfiles/equipo1.npz
+"""
+
+import os
+import argparse
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import rfft, irfft, rfftfreq
+
+from scipy.io import wavfile
+
+import filtros
+import metricas
+import procesamiento_bloques
+
+NFFT_POR_DEFECTO = 4096
+TRAMAS_POR_LOTE = 256
+VENTANA_MEDIANA = 31      # Bins para la mediana local al buscar picos
+UMBRAL_PICO_DB = 10.0     # Prominencia mínima de un pico tonal
+MAX_PICOS = 20
+SOBRE_RESTA = 1.0         # α
+PISO_GANANCIA = 0.05      # β (≈ -26 dB)
+
+def aprender_perfil(datos_audio, fs, nfft=NFFT_POR_DEFECTO, fraccion_silencio=None):
+    """
+    Estima el perfil de ruido de una señal
+
+    Args:
+        datos_audio: Señal (N,) o (N, C) (se promedian los canales)
+        fs: Frecuencia de muestreo
+        nfft: Muestras por trama del promedio de Welch (fija la resolución)
+        fraccion_silencio: Si se da (0-1], solo se usan las tramas más silenciosas
+                           (para grabaciones con señal); None = clip de solo ruido
+
+    Returns:
+        dict: Perfil (ver guardar_perfil)
+    """
+    x = np.asarray(datos_audio, dtype=np.float64)
+    if x.ndim > 1:
+        x = x.mean(axis=1)
+    if len(x) < nfft:
+        x = np.pad(x, (0, nfft - len(x)))
+
+    ventana = np.hanning(nfft)
+    tramas = metricas.enmarcar(x, nfft, nfft // 2)
+
+    seleccion = np.arange(len(tramas))
+    if fraccion_silencio is not None:
+        energia = np.einsum('ij,ij->i', tramas, tramas)
+        cantidad = max(1, int(np.ceil(fraccion_silencio * len(tramas))))
+        seleccion = np.sort(np.argsort(energia)[:cantidad])
+
+    # Promedio de |X|² por lotes de tramas (una rfft por lote)
+    acumulado = np.zeros(nfft // 2 + 1)
+    for inicio in range(0, len(seleccion), TRAMAS_POR_LOTE):
+        lote = tramas[seleccion[inicio:inicio + TRAMAS_POR_LOTE]]
+        acumulado += np.sum(np.abs(rfft(lote * ventana, axis=-1)) ** 2, axis=0)
+    potencia = acumulado / len(seleccion)
+
+    # Densidad espectral de un lado (Welch)
+    densidad = 2 * potencia / (fs * np.sum(ventana ** 2))
+    densidad[0] /= 2
+    if nfft % 2 == 0:
+        densidad[-1] /= 2
+
+    frecuencias = rfftfreq(nfft, 1/fs)
+    picos_frecuencia, picos_db = _buscar_picos(densidad, frecuencias)
+
+    return {
+        'fs': int(fs),
+        'nfft': int(nfft),
+        'frecuencias': frecuencias,
+        'densidad': densidad,
+        'picos_frecuencia': picos_frecuencia,
+        'picos_db': picos_db,
+        'tramas_usadas': len(seleccion)
+    }
+
+def _buscar_picos(densidad, frecuencias):
+    """
+    Picos tonales: máximos locales que superan la mediana local en UMBRAL_PICO_DB
+
+    Returns:
+        tuple: (frecuencias, prominencia en dB), ordenados de mayor a menor
+    """
+    medio = VENTANA_MEDIANA // 2
+    extendida = np.pad(densidad, medio, mode='edge')
+    mediana_local = np.median(sliding_window_view(extendida, VENTANA_MEDIANA), axis=-1)
+
+    prominencia = 10 * np.log10((densidad + 1e-30) / (mediana_local + 1e-30))
+    es_maximo = np.zeros(len(densidad), dtype=bool)
+    es_maximo[1:-1] = (densidad[1:-1] > densidad[:-2]) & (densidad[1:-1] >= densidad[2:])
+
+    indices = np.flatnonzero(es_maximo & (prominencia >= UMBRAL_PICO_DB))
+    indices = indices[np.argsort(prominencia[indices])[::-1][:MAX_PICOS]]
+    return frecuencias[indices], prominencia[indices]
+
+def cargar_audio_escala_completa(ruta_archivo):
+    """
+    Carga un .wav en [-1, 1] según su tipo de dato, sin normalizar al pico
+
+    Returns:
+        tuple: (fs, datos)
+    """
+    fs, datos = wavfile.read(ruta_archivo)
+    return fs, datos.astype(np.float64) / filtros.escala_dtype(datos.dtype)
+
+def nivel_normalizacion(ruta_archivo):
+    """
+    Factor con el que procesar.cargar_audio dividió el archivo (su pico en escala completa)
+
+    El ruido del perfil se divide entre este factor para compararlo con la
+    señal normalizada del archivo.
+    """
+    _, datos, escala = procesamiento_bloques.abrir_audio_mapeado(ruta_archivo)
+    return escala / filtros.escala_dtype(datos.dtype)
+
+def guardar_perfil(perfil, ruta_archivo):
+    """
+    Guarda un perfil en un archivo .npz
+
+    Args:
+        perfil: Resultado de aprender_perfil
+        ruta_archivo: Ruta de salida (.npz)
+    """
+    carpeta = os.path.dirname(ruta_archivo)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    np.savez(ruta_archivo, **perfil)
+
+def cargar_perfil(ruta_archivo):
+    """
+    Carga un perfil guardado con guardar_perfil
+
+    Returns:
+        dict: Perfil
+    """
+    with np.load(ruta_archivo) as datos:
+        perfil = {nombre: datos[nombre] for nombre in datos.files}
+    for nombre in ('fs', 'nfft', 'tramas_usadas'):
+        perfil[nombre] = int(perfil[nombre])
+    return perfil
+
+def potencia_ruido_esperada(perfil, frecuencias, fs, suma_ventana_cuadrada, escala=1.0):
+    """
+    Potencia de ruido esperada por bin para una FFT de cualquier longitud
+
+    Args:
+        perfil: Perfil de ruido
+        frecuencias: Eje de frecuencias de la FFT destino (fftfreq o rfftfreq)
+        fs: Frecuencia de muestreo del audio destino
+        suma_ventana_cuadrada: Σw² de la ventana de esa FFT (N si no hay ventana)
+        escala: Factor de normalización del audio destino (ver nivel_normalizacion)
+
+    Returns:
+        Array con la forma de frecuencias
+    """
+    densidad = np.interp(np.abs(frecuencias), perfil['frecuencias'], perfil['densidad'])
+    return densidad * fs * suma_ventana_cuadrada / (2 * escala ** 2)
+
+def mascara_picos(perfil, frecuencias):
+    """Bins de la FFT destino que caen en un pico tonal del perfil"""
+    if len(perfil['picos_frecuencia']) == 0:
+        return np.zeros(len(frecuencias), dtype=bool)
+    ancho = 1.5 * perfil['fs'] / perfil['nfft']  # Medio ancho del lóbulo de Hann
+    modulo = np.abs(frecuencias)
+    picos = np.zeros(len(frecuencias), dtype=bool)
+    for f0 in perfil['picos_frecuencia']:  # Pocos picos: memoria O(N) en lugar de O(N·picos)
+        picos |= np.abs(modulo - f0) <= ancho
+    return picos
+
+def ganancia_espectral(espectro, potencia_ruido, picos, sobre_resta=SOBRE_RESTA,
+                       piso=PISO_GANANCIA):
+    """
+    Ganancia de resta espectral para un espectro (eje de frecuencia = eje 0)
+
+    Args:
+        espectro: Espectro complejo (K,) o (K, C)
+        potencia_ruido: E|N[k]|² (K,)
+        picos: Máscara booleana de picos tonales (K,)
+        sobre_resta: α
+        piso: β
+
+    Returns:
+        Ganancia real con la forma de espectro
+    """
+    forma = (-1,) + (1,) * (np.ndim(espectro) - 1)
+    potencia = np.abs(espectro) ** 2 + 1e-30
+    ganancia = np.sqrt(np.maximum(1 - sobre_resta * potencia_ruido.reshape(forma) / potencia,
+                                  piso ** 2))
+    return np.where(picos.reshape(forma), piso, ganancia)
+
+def mascara_desde_perfil(perfil, espectro, frecuencias, fs, escala=1.0,
+                         sobre_resta=SOBRE_RESTA, piso=PISO_GANANCIA):
+    """
+    Máscara para el espectro completo de procesar.main (FFT sin ventana)
+
+    Args:
+        perfil: Perfil de ruido
+        espectro: fft de la señal (N,)
+        frecuencias: fftfreq(N, 1/fs)
+        fs: Frecuencia de muestreo
+        escala: Factor de normalización del audio (ver nivel_normalizacion)
+
+    Returns:
+        Array de ganancias (N,)
+    """
+    potencia_ruido = potencia_ruido_esperada(perfil, frecuencias, fs, len(frecuencias), escala)
+    return ganancia_espectral(espectro, potencia_ruido, mascara_picos(perfil, frecuencias),
+                              sobre_resta, piso)
+
+def crear_funcion_ganancia(perfil, fs, tam_trama, suma_ventana_cuadrada, escala=1.0,
+                           sobre_resta=SOBRE_RESTA, piso=PISO_GANANCIA):
+    """
+    Función espectro -> ganancia para tramas rfft de tam_trama muestras
+
+    Sirve para procesamiento_bloques.filtrar_archivo (argumento funcion_ganancia).
+    """
+    frecuencias = rfftfreq(tam_trama, 1/fs)
+    potencia_ruido = potencia_ruido_esperada(perfil, frecuencias, fs, suma_ventana_cuadrada,
+                                             escala)
+    picos = mascara_picos(perfil, frecuencias)
+
+    def funcion_ganancia(espectro):
+        return ganancia_espectral(espectro, potencia_ruido, picos, sobre_resta, piso)
+
+    return funcion_ganancia
+
+class FiltroStreaming:
+    """
+    Aplica un perfil a un stream de bloques de cualquier tamaño
+
+    Solapamiento-suma con Hann periódica y salto L/2 (como procesamiento_bloques).
+    La salida total tiene la misma longitud que la entrada; cada llamada a
+    procesar devuelve las muestras que ya están completas (retardo L/2).
+    Las muestras deben estar en escala completa (escala=1) o divididas entre escala.
+    """
+
+    def __init__(self, perfil, fs, tam_trama=2048, escala=1.0, sobre_resta=SOBRE_RESTA,
+                 piso=PISO_GANANCIA):
+        if tam_trama <= 0 or tam_trama % 2:
+            raise ValueError(f"El tamaño de trama debe ser positivo y par: {tam_trama}")
+        self.L = tam_trama
+        self.salto = tam_trama // 2
+        self.ventana = procesamiento_bloques.ventana_hann_periodica(tam_trama)
+        self.ganancia = crear_funcion_ganancia(perfil, fs, tam_trama,
+                                               np.sum(self.ventana ** 2), escala,
+                                               sobre_resta, piso)
+        self.pendiente = np.zeros(self.salto)   # Medio salto de ceros al inicio
+        self.acumulado = np.zeros(self.L)
+        self.descartar = self.salto
+        self.muestras_entrada = 0
+        self.muestras_salida = 0
+
+    def procesar(self, bloque):
+        """
+        Filtra un bloque del stream
+
+        Args:
+            bloque: Muestras nuevas (M,)
+
+        Returns:
+            Muestras filtradas listas (puede ser vacío)
+        """
+        bloque = np.asarray(bloque, dtype=np.float64)
+        self.muestras_entrada += len(bloque)
+        return self._limitar(self._filtrar(bloque))
+
+    def finalizar(self):
+        """Vacía el búfer y devuelve las últimas muestras del stream"""
+        return self._limitar(self._filtrar(np.zeros(self.L)))
+
+    def _filtrar(self, bloque):
+        """Procesa todas las tramas completas y devuelve las muestras terminadas"""
+        self.pendiente = np.concatenate([self.pendiente, bloque])
+
+        listas = []
+        while len(self.pendiente) >= self.L:
+            espectro = rfft(self.pendiente[:self.L] * self.ventana)
+            self.acumulado += irfft(espectro * self.ganancia(espectro), n=self.L)
+            listas.append(self.acumulado[:self.salto].copy())
+            self.acumulado = np.concatenate([self.acumulado[self.salto:], np.zeros(self.salto)])
+            self.pendiente = self.pendiente[self.salto:]
+
+        salida = np.concatenate(listas) if listas else np.zeros(0)
+        if self.descartar:
+            quitar = min(self.descartar, len(salida))
+            salida = salida[quitar:]
+            self.descartar -= quitar
+        return salida
+
+    def _limitar(self, salida):
+        """Nunca devolver más muestras de las que entraron"""
+        salida = salida[:max(self.muestras_entrada - self.muestras_salida, 0)]
+        self.muestras_salida += len(salida)
+        return salida
+
+def main():
+    """Aprende un perfil de ruido y lo guarda en disco"""
+    parser = argparse.ArgumentParser(description='Aprender un perfil de ruido reutilizable')
+
+    parser.add_argument('--entrada', type=str, required=True,
+                       help='Clip con solo ruido (o grabación con partes silenciosas)')
+    parser.add_argument('--perfil', type=str, required=True,
+                       help='Archivo .npz de salida')
+    parser.add_argument('--nfft', type=int, default=NFFT_POR_DEFECTO,
+                       help='Resolución del perfil (muestras por trama)')
+    parser.add_argument('--silencio', type=float, default=None,
+                       help='Usar solo esta fracción de tramas más silenciosas (ej. 0.1)')
+
+    args = parser.parse_args()
+
+    fs, datos = cargar_audio_escala_completa(args.entrada)
+    perfil = aprender_perfil(datos, fs, args.nfft, args.silencio)
+    guardar_perfil(perfil, args.perfil)
+
+    print(f"Perfil guardado: {args.perfil}")
+    print(f"   • fs: {perfil['fs']} Hz | nfft: {perfil['nfft']} "
+          f"(resolución {perfil['fs'] / perfil['nfft']:.2f} Hz)")
+    print(f"   • Tramas usadas: {perfil['tramas_usadas']}")
+    if len(perfil['picos_frecuencia']):
+        picos = ', '.join(f"{f:.1f} Hz (+{p:.0f} dB)"
+                          for f, p in zip(perfil['picos_frecuencia'], perfil['picos_db']))
+        print(f"   • Picos tonales: {picos}")
+    else:
+        print("   • Sin picos tonales")
+
+if __name__ == "__main__":
+    main()
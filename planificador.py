@@ -0,0 +1,180 @@
+"""
+PLANIFICADOR DE MEMORIA
+Elige entre procesar el archivo completo, por bloques o por segmentos en paralelo
+
+Lee solo la cabecera del .wav (muestras, canales, tipo de dato) y estima el
+pico de memoria de cada estrategia con las opciones elegidas. Con un límite
+(--max-memoria) escoge la estrategia más rápida que cabe:
+
+    1. completo             FFT de todo el archivo (procesar.main)
+    2. segmentado_paralelo  tramas OLA repartidas en varios hilos
+    3. bloques              tramas OLA una a una
+
+Las estimaciones cuentan los arrays que procesar.main mantiene vivos en cada
+etapa (ver _bytes_por_muestra_completo) más un margen para el intérprete y
+las librerías. Son aproximadas: sirven para decidir, no para medir.
+"""
+
+import os
+import struct
+
+import procesamiento_bloques
+
+ESTRATEGIAS = ('completo', 'segmentado_paralelo', 'bloques')  # De más rápida a más lenta
+MEMORIA_BASE = 150 * 1024 * 1024  # Python + numpy + scipy + matplotlib
+MARGEN_SEGURIDAD = 1.2
+
+class MemoriaInsuficiente(Exception):
+    """Ninguna estrategia cabe en el límite de memoria indicado"""
+
+def parsear_tamano(texto):
+    """
+    Convierte textos como '512M', '4G' o '1048576' a bytes
+
+    Args:
+        texto: Tamaño con sufijo opcional K, M o G (base 1024)
+
+    Returns:
+        int: Bytes
+    """
+    texto = texto.strip().upper().rstrip('B')
+    multiplicadores = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if texto and texto[-1] in multiplicadores:
+        return int(float(texto[:-1]) * multiplicadores[texto[-1]])
+    return int(float(texto))
+
+def formatear_tamano(num_bytes):
+    """Formatea bytes en MB/GB legibles"""
+    if num_bytes >= 1024 ** 3:
+        return f"{num_bytes / 1024 ** 3:.2f} GB"
+    return f"{num_bytes / 1024 ** 2:.1f} MB"
+
+def leer_cabecera_wav(ruta_archivo):
+    """
+    Lee el formato de un .wav sin cargar las muestras
+
+    Args:
+        ruta_archivo: Ruta del archivo .wav
+
+    Returns:
+        dict: fs, canales, bytes_por_muestra, es_flotante, muestras (por canal)
+    """
+    with open(ruta_archivo, 'rb') as f:
+        riff, _, formato = struct.unpack('<4sI4s', f.read(12))
+        if riff not in (b'RIFF', b'RF64') or formato != b'WAVE':
+            raise ValueError(f"No es un archivo WAV: {ruta_archivo}")
+
+        cabecera = None
+        tamano_datos = None
+        while True:
+            encabezado = f.read(8)
+            if len(encabezado) < 8:
+                break
+            nombre, tamano = struct.unpack('<4sI', encabezado)
+            if nombre == b'fmt ':
+                fmt = f.read(tamano)
+                codigo, canales, fs, _, _, bits = struct.unpack('<HHIIHH', fmt[:16])
+                if codigo == 0xFFFE and len(fmt) >= 26:  # WAVE_FORMAT_EXTENSIBLE
+                    codigo = struct.unpack('<H', fmt[24:26])[0]
+                cabecera = {'fs': fs, 'canales': canales, 'bytes_por_muestra': bits // 8,
+                            'es_flotante': codigo == 3}
+            elif nombre == b'data':
+                tamano_datos = tamano
+                break
+            else:
+                f.seek(tamano + (tamano & 1), os.SEEK_CUR)
+
+    if cabecera is None or tamano_datos is None:
+        raise ValueError(f"Cabecera WAV incompleta: {ruta_archivo}")
+
+    if tamano_datos == 0xFFFFFFFF:  # RF64 / tamaño desconocido: usar el del archivo
+        tamano_datos = os.path.getsize(ruta_archivo)
+    cabecera['muestras'] = tamano_datos // (cabecera['bytes_por_muestra'] * cabecera['canales'])
+    return cabecera
+
+def _bytes_por_muestra_completo(cabecera, graficas=True):
+    """
+    Bytes por muestra (y canal) en el pico de procesar.main
+
+    Arrays vivos tras la IFFT (float32 de entrada):
+        datos 4 + espectro complex64 8 + frecuencias 8 + mascara 8
+        + espectro_filtrado complex128 16 + ifft complex128 16 = 60
+    Temporales encima de eso:
+        carga: entrada cruda + 2 copias float32
+        métricas: ruido 8 + temporales 16, y metricas.evaluar ~48
+          (potencias del espectro completo para la LSD global y la retención;
+          la LSD segmental va por lotes de tramas y no crece con N)
+        gráficas: tiempo, diferencia y la respuesta del filtro ~56
+    """
+    flotante = 8 if cabecera['es_flotante'] and cabecera['bytes_por_muestra'] == 8 else 4
+    complejo = 2 * flotante
+
+    carga = cabecera['bytes_por_muestra'] + 2 * flotante
+    vivos = flotante + complejo + 8 + 8 + 16 + 16
+    metricas = vivos + 8 + 16 + 48
+    pico = max(carga, metricas)
+    if graficas:
+        pico = max(pico, vivos + 8 + 56)
+    return pico
+
+def estimar_memoria(cabecera, estrategia, graficas=True,
+                    tam_trama=procesamiento_bloques.TAM_TRAMA_POR_DEFECTO, hilos=None):
+    """
+    Estima el pico de memoria de una estrategia
+
+    Args:
+        cabecera: Resultado de leer_cabecera_wav
+        estrategia: 'completo', 'bloques' o 'segmentado_paralelo'
+        graficas: Si se generarán gráficas (solo afecta a 'completo')
+        tam_trama: Muestras por trama para las estrategias por bloques
+        hilos: Hilos para 'segmentado_paralelo'
+
+    Returns:
+        int: Bytes estimados
+    """
+    canales = cabecera['canales']
+
+    if estrategia == 'completo':
+        datos = cabecera['muestras'] * canales * _bytes_por_muestra_completo(cabecera, graficas)
+    else:
+        # Por trama: trama float64, producto con ventana, rfft, irfft y copia float32
+        por_trama = tam_trama * canales * (8 + 8 + 8 + 8 + 4)
+        trabajadores = 1 if estrategia == 'bloques' else (hilos or os.cpu_count() or 1)
+        datos = trabajadores * por_trama
+
+    return int(datos * MARGEN_SEGURIDAD) + MEMORIA_BASE
+
+def planificar(ruta_archivo, max_memoria=None, graficas=True,
+               tam_trama=procesamiento_bloques.TAM_TRAMA_POR_DEFECTO, hilos=None,
+               estrategia=None):
+    """
+    Elige la estrategia más rápida que cabe en el límite de memoria
+
+    Args:
+        ruta_archivo: Archivo .wav de entrada
+        max_memoria: Límite en bytes (None = sin límite)
+        graficas: Si se generarán gráficas
+        tam_trama: Muestras por trama para las estrategias por bloques
+        hilos: Hilos para 'segmentado_paralelo'
+        estrategia: Forzar una estrategia (se valida contra el límite)
+
+    Returns:
+        dict: estrategia elegida, cabecera y estimación de cada estrategia
+
+    Raises:
+        MemoriaInsuficiente: Si ninguna estrategia (o la forzada) cabe
+    """
+    cabecera = leer_cabecera_wav(ruta_archivo)
+    estimaciones = {e: estimar_memoria(cabecera, e, graficas, tam_trama, hilos)
+                    for e in ESTRATEGIAS}
+    candidatas = [estrategia] if estrategia else ESTRATEGIAS
+
+    for candidata in candidatas:
+        if max_memoria is None or estimaciones[candidata] <= max_memoria:
+            return {'estrategia': candidata, 'cabecera': cabecera,
+                    'estimaciones': estimaciones}
+
+    detalle = ', '.join(f"{e}: {formatear_tamano(estimaciones[e])}" for e in candidatas)
+    raise MemoriaInsuficiente(
+        f"Ninguna estrategia cabe en {formatear_tamano(max_memoria)} ({detalle}). "
+        f"Aumenta --max-memoria o reduce --tam-trama / --hilos.")
@@ -120,6 +120,7 @@ def mostrar_instrucciones():
     -----------
     1. Primero genera audios de prueba:
        python audio.py
+       (audio largo por bloques: python audio.py --largo datos/largo.wav --duracion 3600)
     
     2. Luego procesa algun audio:
        python procesar.py --entrada datos/senal_ruido_blanco.wav
@@ -127,7 +128,14 @@ def mostrar_instrucciones():
     OPCIONES AVANZADAS:
     ------------------
     • Cambiar tipo de filtro:
-      --filtro pasa_bajas|pasa_altas|pasa_banda|notch
+      --filtro pasa_bajas|pasa_altas|pasa_banda|notch|ondiculas|perfil
+    
+    • Opciones del filtro ondiculas (wavelets):
+      --ondicula db4 --niveles 5 --umbral suave|duro
+    
+    • Perfil de ruido aprendido una vez (clip con solo ruido):
+      python perfiles_ruido.py --entrada ruido.wav --perfil perfiles/equipo.npz
+      --filtro perfil --perfil-ruido perfiles/equipo.npz
     
     • Especificar frecuencia de corte:
       --corte 1000  (para pasa_bajas/pasa_altas)
@@ -141,6 +149,15 @@ def mostrar_instrucciones():
     • Desactivar graficas:
       --graficas False
     
+    • Reutilizar el espectro al re-filtrar el mismo archivo:
+      --cache  (opcional: --cache-max-mb 512, --cache-contenido)
+    
+    • Procesar un corpus completo (reanudable si se interrumpe):
+      python trabajos.py --entradas datos/ --filtro pasa_bajas --corte 800
+    
+    • Limitar la memoria (elige archivo completo, bloques o segmentos en paralelo):
+      --max-memoria 4G  (o forzar con --estrategia bloques)
+    
     EJEMPLOS:
     ---------
     1. Filtro pasa-bajas a 800Hz:
@@ -0,0 +1,253 @@
+"""
+FILTRADO POR BLOQUES (MEMORIA ACOTADA)
+Aplica la misma máscara de procesar.py por tramas con solapamiento-suma (OLA)
+
+El camino normal de procesar.py carga todo el archivo y calcula una FFT de
+longitud N: la memoria crece con la duración. Aquí la señal se lee mapeada en
+memoria y se procesa por tramas de L muestras:
+
+    y_j = IFFT{ FFT{x_j · w} · H }      (w = ventana de Hann periódica)
+    y   = Σ_j y_j desplazada j·L/2
+
+Con salto L/2 la suma de ventanas de Hann desplazadas es 1, así que sin
+filtro la señal se reconstruye exactamente. Con filtro el resultado se parece
+al de la FFT completa salvo la resolución de la máscara (fs/L Hz).
+
+Estrategias:
+- filtrar_por_bloques: una trama tras otra (memoria ~ una trama)
+- filtrar_segmentado_paralelo: tramas pares e impares por separado en varios
+  hilos (las tramas de la misma paridad no se solapan, así que no hay
+  conflictos al escribir; scipy.fft libera el GIL)
+
+La salida intermedia se guarda en un archivo temporal mapeado en disco y se
+escribe al .wav final en bloques de 16 bits.
+"""
+
+import os
+import wave
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.io import wavfile
+from scipy.fft import rfft, irfft, rfftfreq
+
+import filtros
+
+TAM_TRAMA_POR_DEFECTO = 1 << 16  # 65536 muestras (~1.5 s a 44.1 kHz)
+
+def abrir_audio_mapeado(ruta_archivo):
+    """
+    Abre un .wav sin cargarlo en memoria
+
+    Args:
+        ruta_archivo: Ruta del archivo .wav
+
+    Returns:
+        tuple: (fs, datos mapeados (N,) o (N, C), escala hasta [-1, 1])
+    """
+    fs, datos = wavfile.read(ruta_archivo, mmap=True)
+
+    # Máximo absoluto global por bloques (igual que la normalización de cargar_audio)
+    max_valor = 0.0
+    for inicio in range(0, len(datos), TAM_TRAMA_POR_DEFECTO):
+        bloque = datos[inicio:inicio + TAM_TRAMA_POR_DEFECTO]
+        max_valor = max(max_valor, float(np.max(np.abs(bloque.astype(np.float64)))))
+
+    escala = filtros.escala_dtype(datos.dtype)
+    if max_valor > 0:
+        escala = max_valor
+    return fs, datos, escala
+
+def ventana_hann_periodica(L):
+    """Ventana de Hann periódica (suma constante con salto L/2)"""
+    n = np.arange(L)
+    return 0.5 - 0.5 * np.cos(2 * np.pi * n / L)
+
+class _FiltroTramas:
+    """Estado compartido para filtrar la trama j de una señal mapeada"""
+
+    def __init__(self, datos, escala, salida, fs, tipo_filtro, frecuencia_corte,
+                 rango_frecuencias, L, funcion_ganancia=None):
+        if L <= 0 or L % 2:
+            raise ValueError(f"El tamaño de trama debe ser positivo y par: {L}")
+        self.datos = datos
+        self.escala = escala
+        self.salida = salida
+        self.L = L
+        self.salto = L // 2
+        self.N = len(datos)
+        self.ventana = ventana_hann_periodica(L)
+        if datos.ndim > 1:
+            self.ventana = self.ventana[:, None]
+        self.funcion_ganancia = funcion_ganancia
+        if funcion_ganancia is None:
+            frecuencias = rfftfreq(L, 1/fs)
+            self.mascara = filtros.crear_mascara_filtro(frecuencias, tipo_filtro,
+                                                        frecuencia_corte, rango_frecuencias)
+            if datos.ndim > 1:
+                self.mascara = self.mascara[:, None]
+        # La primera trama empieza medio salto antes de la señal para cubrir el borde
+        self.num_tramas = (self.N + self.salto) // self.salto + 1
+
+    def procesar_trama(self, j):
+        """Filtra la trama j y la suma en la salida"""
+        inicio = j * self.salto - self.salto
+        a, b = max(inicio, 0), min(inicio + self.L, self.N)
+        if a >= b:
+            return
+
+        trama = np.zeros((self.L,) + self.datos.shape[1:], dtype=np.float64)
+        trama[a - inicio:b - inicio] = self.datos[a:b]
+        trama /= self.escala
+
+        espectro = rfft(trama * self.ventana, axis=0)
+        if self.funcion_ganancia is None:
+            espectro *= self.mascara
+        else:
+            espectro *= self.funcion_ganancia(espectro)
+        filtrada = irfft(espectro, n=self.L, axis=0)
+
+        self.salida[a:b] += filtrada[a - inicio:b - inicio].astype(self.salida.dtype)
+
+def _crear_salida_temporal(forma, carpeta):
+    """Array float32 mapeado en un archivo temporal (se borra al cerrar)"""
+    archivo = tempfile.NamedTemporaryFile(suffix='.f32', dir=carpeta, delete=False)
+    archivo.close()
+    salida = np.memmap(archivo.name, dtype=np.float32, mode='w+', shape=forma)
+    return salida, archivo.name
+
+def filtrar_por_bloques(datos, escala, salida, fs, tipo_filtro='pasa_bajas',
+                        frecuencia_corte=1000, rango_frecuencias=(500, 1500),
+                        tam_trama=TAM_TRAMA_POR_DEFECTO, funcion_ganancia=None):
+    """
+    Filtra la señal trama a trama con solapamiento-suma
+
+    Args:
+        datos: Señal (mapeada) en su dtype original
+        escala: Divisor que lleva la señal a [-1, 1]
+        salida: Array float32 de la misma forma, inicializado en cero
+        fs: Frecuencia de muestreo
+        tipo_filtro, frecuencia_corte, rango_frecuencias: Ver filtros.crear_mascara_filtro
+        tam_trama: Muestras por trama (par)
+        funcion_ganancia: Función(espectro de la trama) -> ganancia; si se da,
+                          reemplaza a la máscara fija (ej. perfiles_ruido)
+    """
+    filtro = _FiltroTramas(datos, escala, salida, fs, tipo_filtro, frecuencia_corte,
+                           rango_frecuencias, tam_trama, funcion_ganancia)
+    for j in range(filtro.num_tramas):
+        filtro.procesar_trama(j)
+
+def filtrar_segmentado_paralelo(datos, escala, salida, fs, tipo_filtro='pasa_bajas',
+                                frecuencia_corte=1000, rango_frecuencias=(500, 1500),
+                                tam_trama=TAM_TRAMA_POR_DEFECTO, hilos=None,
+                                funcion_ganancia=None):
+    """
+    Igual que filtrar_por_bloques pero repartiendo las tramas entre hilos
+
+    Primero se procesan todas las tramas pares y después las impares: dentro
+    de cada fase las tramas no se solapan y cada hilo escribe en su región.
+
+    Args:
+        hilos: Número de hilos (por defecto, núcleos disponibles)
+        (resto igual que filtrar_por_bloques)
+    """
+    filtro = _FiltroTramas(datos, escala, salida, fs, tipo_filtro, frecuencia_corte,
+                           rango_frecuencias, tam_trama, funcion_ganancia)
+    hilos = hilos or os.cpu_count() or 1
+
+    with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+        for paridad in (0, 1):
+            list(ejecutor.map(filtro.procesar_trama, range(paridad, filtro.num_tramas, 2)))
+
+def calcular_metricas_por_bloques(datos, escala, salida, tam_bloque=TAM_TRAMA_POR_DEFECTO):
+    """
+    MSE, SNR y PSNR acumulados por bloques (mismas fórmulas que procesar.calcular_metricas)
+
+    Returns:
+        dict: 'mse', 'snr_db', 'psnr_db'
+    """
+    suma_error = 0.0
+    suma_senal = 0.0
+    total = 0
+    for inicio in range(0, len(datos), tam_bloque):
+        original = datos[inicio:inicio + tam_bloque].astype(np.float64) / escala
+        procesada = salida[inicio:inicio + tam_bloque].astype(np.float64)
+        suma_error += float(np.sum((original - procesada) ** 2))
+        suma_senal += float(np.sum(original ** 2))  # Referencia: la señal original
+        total += original.size
+
+    mse = suma_error / total
+    snr = 10 * np.log10(suma_senal / suma_error) if suma_error > 0 else float('inf')
+    psnr = 10 * np.log10(1.0 / mse) if mse > 0 else float('inf')
+    return {'mse': mse, 'snr_db': snr, 'psnr_db': psnr}
+
+def guardar_audio_por_bloques(salida, fs, ruta_archivo, tam_bloque=TAM_TRAMA_POR_DEFECTO):
+    """
+    Normaliza y guarda en 16 bits sin cargar toda la señal (ver procesar.guardar_audio)
+
+    Args:
+        salida: Señal float (mapeada) (N,) o (N, C)
+        fs: Frecuencia de muestreo
+        ruta_archivo: Ruta del .wav de salida
+        tam_bloque: Muestras por bloque de escritura
+    """
+    max_valor = 0.0
+    for inicio in range(0, len(salida), tam_bloque):
+        max_valor = max(max_valor, float(np.max(np.abs(salida[inicio:inicio + tam_bloque]))))
+    if max_valor == 0:
+        max_valor = 1.0
+
+    canales = salida.shape[1] if salida.ndim > 1 else 1
+    with wave.open(ruta_archivo, 'wb') as archivo:
+        archivo.setnchannels(canales)
+        archivo.setsampwidth(2)
+        archivo.setframerate(int(fs))
+        for inicio in range(0, len(salida), tam_bloque):
+            bloque = salida[inicio:inicio + tam_bloque] / max_valor
+            archivo.writeframes(np.int16(bloque * 32767).astype('<i2').tobytes())
+
+def filtrar_archivo(ruta_entrada, ruta_salida, estrategia='bloques', tipo_filtro='pasa_bajas',
+                    frecuencia_corte=1000, rango_frecuencias=(500, 1500),
+                    tam_trama=TAM_TRAMA_POR_DEFECTO, hilos=None, crear_ganancia=None):
+    """
+    Filtra un archivo completo con memoria acotada
+
+    Args:
+        ruta_entrada: Archivo .wav de entrada
+        ruta_salida: Archivo .wav de salida
+        estrategia: 'bloques' o 'segmentado_paralelo'
+        tipo_filtro, frecuencia_corte, rango_frecuencias: Ver filtros.crear_mascara_filtro
+        tam_trama: Muestras por trama (par)
+        hilos: Hilos para 'segmentado_paralelo'
+        crear_ganancia: Función(fs, tam_trama, Σw²) -> funcion_ganancia (opcional)
+
+    Returns:
+        dict: fs, número de muestras y métricas (MSE, SNR, PSNR)
+    """
+    fs, datos, escala = abrir_audio_mapeado(ruta_entrada)
+    funcion_ganancia = None
+    if crear_ganancia is not None:
+        funcion_ganancia = crear_ganancia(fs, tam_trama,
+                                          np.sum(ventana_hann_periodica(tam_trama) ** 2))
+    carpeta = os.path.dirname(os.path.abspath(ruta_salida))
+    salida, ruta_temporal = _crear_salida_temporal(datos.shape, carpeta)
+
+    try:
+        if estrategia == 'bloques':
+            filtrar_por_bloques(datos, escala, salida, fs, tipo_filtro, frecuencia_corte,
+                                rango_frecuencias, tam_trama, funcion_ganancia)
+        elif estrategia == 'segmentado_paralelo':
+            filtrar_segmentado_paralelo(datos, escala, salida, fs, tipo_filtro,
+                                        frecuencia_corte, rango_frecuencias, tam_trama, hilos,
+                                        funcion_ganancia)
+        else:
+            raise ValueError(f"Estrategia no válida: {estrategia}")
+
+        metricas = calcular_metricas_por_bloques(datos, escala, salida)
+        guardar_audio_por_bloques(salida, fs, ruta_salida)
+    finally:
+        del salida
+        os.remove(ruta_temporal)
+
+    return {'fs': fs, 'muestras': len(datos), 'metricas': metricas}
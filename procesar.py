@@ -12,6 +12,17 @@ import matplotlib.pyplot as plt
 from scipy.io import wavfile
 from scipy.fft import fft, ifft, fftfreq
 import argparse
+import functools
+import os
+import sys
+import time
+import almacen_espectros
+from filtros import crear_mascara_filtro
+import planificador
+import procesamiento_bloques
+import ondiculas
+import perfiles_ruido
+import metricas as metricas_calidad
 
 def cargar_audio(ruta_archivo):
     """
@@ -57,44 +68,53 @@ def guardar_audio(datos_audio, frecuencia_muestreo, ruta_archivo):
     datos_int16 = np.int16(datos_audio * 32767)
     wavfile.write(ruta_archivo, frecuencia_muestreo, datos_int16)
 
-def crear_mascara_filtro(frecuencias, tipo_filtro='pasa_bajas', 
-                        frecuencia_corte=1000, rango_frecuencias=(500, 1500)):
+def parsear_rango(texto_rango, por_defecto=(500, 1500)):
     """
-    Crea una máscara para diferentes tipos de filtros
+    Convierte el texto 'min-max' de --rango en una tupla de frecuencias
     
     Args:
-        frecuencias: Array de frecuencias
+        texto_rango: Texto con formato 'min-max' (ej. '500-1500')
+        por_defecto: Tupla usada si el texto no tiene el formato esperado
+    
+    Returns:
+        tuple: (min, max) en Hz
+    """
+    if '-' in texto_rango:
+        rango_min, rango_max = map(float, texto_rango.split('-'))
+        return (rango_min, rango_max)
+    return por_defecto
+
+def filtrar_audio(datos_audio, frecuencia_muestreo, tipo_filtro='pasa_bajas',
+                  frecuencia_corte=1000, rango_frecuencias=(500, 1500), espectro=None):
+    """
+    Aplica el filtrado completo FFT -> máscara -> IFFT sobre una señal
+    
+    Args:
+        datos_audio: Señal normalizada
+        frecuencia_muestreo: Frecuencia de muestreo en Hz
         tipo_filtro: 'pasa_bajas', 'pasa_altas', 'pasa_banda', 'notch'
         frecuencia_corte: Frecuencia de corte para pasa_bajas/pasa_altas
         rango_frecuencias: Tupla (min, max) para pasa_banda/notch
+        espectro: FFT ya calculada de la señal (se omite la FFT si se da)
     
     Returns:
-        mascara: Array de 1s y 0s
+        dict: Señal filtrada, espectros y eje de frecuencias
     """
-    mascara = np.ones_like(frecuencias, dtype=float)
+    N = len(datos_audio)
+    if espectro is None:
+        espectro = fft(datos_audio)
+    frecuencias = fftfreq(N, 1/frecuencia_muestreo)
     
-    if tipo_filtro == 'pasa_bajas':
-        # Conserva frecuencias bajas
-        mascara[np.abs(frecuencias) > frecuencia_corte] = 0.0
-    
-    elif tipo_filtro == 'pasa_altas':
-        # Conserva frecuencias altas
-        mascara[np.abs(frecuencias) < frecuencia_corte] = 0.0
-    
-    elif tipo_filtro == 'pasa_banda':
-        # Conserva solo un rango
-        min_freq, max_freq = rango_frecuencias
-        mascara[(np.abs(frecuencias) < min_freq) | (np.abs(frecuencias) > max_freq)] = 0.0
-    
-    elif tipo_filtro == 'notch':
-        # Elimina un rango específico
-        min_freq, max_freq = rango_frecuencias
-        mascara[(np.abs(frecuencias) >= min_freq) & (np.abs(frecuencias) <= max_freq)] = 0.0
-    
-    else:
-        raise ValueError(f"Tipo de filtro no válido: {tipo_filtro}")
+    mascara = crear_mascara_filtro(frecuencias, tipo_filtro, frecuencia_corte, rango_frecuencias)
+    espectro_filtrado = espectro * mascara
+    datos_filtrados = np.real(ifft(espectro_filtrado))
     
-    return mascara
+    return {
+        'datos_filtrados': datos_filtrados,
+        'espectro': espectro,
+        'espectro_filtrado': espectro_filtrado,
+        'frecuencias': frecuencias
+    }
 
 def calcular_metricas(original, procesada):
     """
@@ -115,9 +135,10 @@ def calcular_metricas(original, procesada):
     # MSE (Error Cuadrático Medio)
     mse = np.mean((original - procesada) ** 2)
     
-    # SNR (Relación Señal-Ruido)
+    # SNR (Relación Señal-Ruido), con la señal original como referencia
+    # (referida a la procesada, filtrar de más subiría el SNR)
     ruido = original - procesada
-    potencia_senal = np.mean(procesada ** 2)
+    potencia_senal = np.mean(original ** 2)
     potencia_ruido = np.mean(ruido ** 2)
     
     if potencia_ruido > 0:
@@ -245,6 +266,55 @@ def graficar_resultados(datos_original, datos_filtrada, espectro_original,
     
     return fig
 
+def procesar_por_bloques(args, estrategia):
+    """
+    Ejecuta el filtrado con memoria acotada (estrategias 'bloques' y 'segmentado_paralelo')
+    
+    Args:
+        args: Argumentos de la línea de comandos
+        estrategia: Estrategia elegida por el planificador
+    """
+    rango_tuple = parsear_rango(args.rango)
+    crear_ganancia = None
+    if args.filtro == 'perfil':
+        perfil = perfiles_ruido.cargar_perfil(args.perfil_ruido)
+        crear_ganancia = functools.partial(perfiles_ruido.crear_funcion_ganancia, perfil,
+                                           escala=perfiles_ruido.nivel_normalizacion(args.entrada))
+    
+    print(f"\n[1/2] Filtrando por tramas ({estrategia}, {args.tam_trama} muestras)...")
+    resultado = procesamiento_bloques.filtrar_archivo(args.entrada, args.salida, estrategia,
+                                                      args.filtro, args.corte, rango_tuple,
+                                                      args.tam_trama, args.hilos, crear_ganancia)
+    fs, N = resultado['fs'], resultado['muestras']
+    metricas = resultado['metricas']
+    print(f"   • Muestras: {N}")
+    print(f"   • Frecuencia de muestreo: {fs} Hz")
+    print(f"   • Duración: {N/fs:.2f} segundos")
+    
+    print(f"\n[2/2] Métricas de calidad...")
+    print(f"   • MSE: {metricas['mse']:.6f}")
+    print(f"   • SNR: {metricas['snr_db']:.2f} dB")
+    print(f"   • PSNR: {metricas['psnr_db']:.2f} dB")
+    print(f"    Audio guardado como: {args.salida}")
+    if args.graficas:
+        print("   • Gráficas omitidas (requieren el espectro completo)")
+    
+    print("\n" + "="*60)
+    print("RESUMEN DEL PROCESAMIENTO")
+    print("="*60)
+    print(f"Estrategia: {estrategia}")
+    print(f"Filtro aplicado: {args.filtro}")
+    if args.filtro in ['pasa_bajas', 'pasa_altas']:
+        print(f"Frecuencia de corte: {args.corte} Hz")
+    elif args.filtro == 'perfil':
+        print(f"Perfil de ruido: {args.perfil_ruido}")
+    else:
+        print(f"Rango de frecuencias: {rango_tuple[0]}-{rango_tuple[1]} Hz")
+    print(f"MSE: {metricas['mse']:.6f}")
+    print(f"SNR: {metricas['snr_db']:.2f} dB")
+    print(f"Archivo de salida: {args.salida}")
+    print("="*60)
+
 def main():
     """Función principal del programa"""
     parser = argparse.ArgumentParser(description='Denoising de audio con FFT')
@@ -254,24 +324,92 @@ def main():
     parser.add_argument('--salida', type=str, default='resultados/audios_procesados/resultado_limpio.wav',
                        help='Archivo de audio de salida')
     parser.add_argument('--filtro', type=str, default='pasa_bajas',
-                       choices=['pasa_bajas', 'pasa_altas', 'pasa_banda', 'notch'],
+                       choices=['pasa_bajas', 'pasa_altas', 'pasa_banda', 'notch', 'ondiculas', 'perfil'],
                        help='Tipo de filtro a aplicar')
     parser.add_argument('--corte', type=float, default=1000.0,
                        help='Frecuencia de corte para pasa_bajas/pasa_altas')
     parser.add_argument('--rango', type=str, default='500-1500',
                        help='Rango para pasa_banda/notch (formato: min-max)')
+    parser.add_argument('--ondicula', type=str, default='db4',
+                       choices=list(ondiculas.ONDICULAS),
+                       help='Ondícula para el filtro ondiculas')
+    parser.add_argument('--niveles', type=int, default=5,
+                       help='Niveles de descomposición para el filtro ondiculas')
+    parser.add_argument('--umbral', type=str, default='suave', choices=['suave', 'duro'],
+                       help='Tipo de umbral para el filtro ondiculas')
+    parser.add_argument('--perfil-ruido', type=str, default=None,
+                       help='Perfil de ruido .npz para el filtro perfil (ver perfiles_ruido.py)')
     parser.add_argument('--graficas', type=bool, default=True,
                        help='Mostrar gráficas')
+    parser.add_argument('--cache', type=str, nargs='?', default=None,
+                       const=almacen_espectros.DIRECTORIO_POR_DEFECTO,
+                       help='Reutilizar el espectro guardado en disco (carpeta opcional)')
+    parser.add_argument('--cache-max-mb', type=float,
+                       default=almacen_espectros.LIMITE_POR_DEFECTO_MB,
+                       help='Tamaño máximo del almacén de espectros en MB')
+    parser.add_argument('--cache-contenido', action='store_true',
+                       help='Invalidar el almacén por hash del contenido en lugar de mtime')
+    parser.add_argument('--max-memoria', '--max-memory', dest='max_memoria', type=str, default=None,
+                       help='Límite de memoria (ej. 512M, 4G): elige la estrategia más rápida que cabe')
+    parser.add_argument('--estrategia', type=str, default='auto',
+                       choices=['auto'] + list(planificador.ESTRATEGIAS),
+                       help='Estrategia de ejecución (auto = según --max-memoria)')
+    parser.add_argument('--tam-trama', type=int,
+                       default=procesamiento_bloques.TAM_TRAMA_POR_DEFECTO,
+                       help='Muestras por trama en las estrategias por bloques')
+    parser.add_argument('--hilos', type=int, default=None,
+                       help='Hilos para la estrategia segmentado_paralelo')
     
     args = parser.parse_args()
+    if args.tam_trama <= 0 or args.tam_trama % 2:
+        # Con salto L/2 la ventana de Hann solo suma 1 si L es par
+        parser.error("--tam-trama debe ser un entero positivo y par")
+    if args.niveles < 1:
+        # Con 0 niveles la DWT no descompone nada y el filtro sería la identidad
+        parser.error("--niveles debe ser al menos 1")
+    if args.filtro == 'perfil' and not args.perfil_ruido:
+        parser.error("--filtro perfil requiere --perfil-ruido")
     
     print("="*60)
     print("PROYECTO TERMINAL: DENOISING DE AUDIO CON FFT")
     print("="*60)
     
+    # Elegir estrategia según la memoria disponible (antes de cargar nada)
+    if args.max_memoria or args.estrategia != 'auto':
+        limite = planificador.parsear_tamano(args.max_memoria) if args.max_memoria else None
+        forzada = None if args.estrategia == 'auto' else args.estrategia
+        if args.filtro == 'ondiculas':
+            forzada = 'completo'  # La DWT necesita la señal completa
+        try:
+            plan = planificador.planificar(args.entrada, limite, bool(args.graficas),
+                                           args.tam_trama, args.hilos, forzada)
+        except planificador.MemoriaInsuficiente as e:
+            print(f"\nERROR: {e}")
+            sys.exit(1)
+        
+        print(f"\n[PLAN] Memoria estimada por estrategia"
+              f" (límite: {planificador.formatear_tamano(limite) if limite else 'sin límite'}):")
+        for estrategia, estimacion in plan['estimaciones'].items():
+            marca = '->' if estrategia == plan['estrategia'] else '  '
+            print(f"   {marca} {estrategia}: {planificador.formatear_tamano(estimacion)}")
+        
+        if plan['estrategia'] != 'completo':
+            procesar_por_bloques(args, plan['estrategia'])
+            return
+    
+    # Buscar espectro ya calculado en ejecuciones anteriores
+    guardado = None
+    if args.cache:
+        guardado = almacen_espectros.buscar_espectro(args.entrada, args.cache,
+                                                     args.cache_contenido)
+    
     # 1. Cargar audio
     print(f"\n[1/6] Cargando audio: {args.entrada}")
-    fs, datos = cargar_audio(args.entrada)
+    if guardado is not None:
+        fs, datos, espectro = guardado
+        print(f"   • Espectro reutilizado desde: {args.cache}")
+    else:
+        fs, datos = cargar_audio(args.entrada)
     N = len(datos)
     print(f"   • Muestras: {N}")
     print(f"   • Frecuencia de muestreo: {fs} Hz")
@@ -279,28 +417,61 @@ def main():
     
     # 2. Calcular FFT
     print(f"\n[2/6] Calculando Transformada de Fourier...")
-    espectro = fft(datos)
+    if guardado is None:
+        espectro = fft(datos)
+        if args.cache and not almacen_espectros.guardar_espectro(args.entrada, fs, datos, espectro,
+                                                                 args.cache, args.cache_contenido,
+                                                                 args.cache_max_mb):
+            print(f"   • AVISO: el espectro ({(datos.nbytes + espectro.nbytes) / 1024**2:.0f} MB) "
+                  f"supera --cache-max-mb ({args.cache_max_mb:g} MB); no se guarda")
+    else:
+        print(f"   • FFT omitida (archivo sin cambios)")
     frecuencias = fftfreq(N, 1/fs)
     
     # 3. Crear y aplicar filtro
     print(f"\n[3/6] Aplicando filtro {args.filtro}...")
     
     # Parsear rango si es necesario
-    if '-' in args.rango:
-        rango_min, rango_max = map(float, args.rango.split('-'))
-        rango_tuple = (rango_min, rango_max)
+    rango_tuple = parsear_rango(args.rango)
+    
+    if args.filtro == 'ondiculas':
+        # Umbralización wavelet en lugar de máscara de Fourier
+        inicio = time.perf_counter()
+        resultado = ondiculas.eliminar_ruido(datos, args.ondicula, args.niveles, args.umbral)
+        tiempo_ondiculas = time.perf_counter() - inicio
+        datos_filtrados = resultado['datos_filtrados']
+        print(f"   • Ondícula: {args.ondicula} | Niveles: {resultado['niveles']} | Umbral: {args.umbral}")
+        print(f"   • Ruido estimado (σ): {resultado['sigma']:.5f} | λ: {resultado['umbral']:.5f}")
+        
+        # 4. Espectro del resultado (para métricas, Parseval y gráficas)
+        print(f"\n[4/6] Calculando espectro de la señal limpia...")
+        espectro_filtrado = fft(datos_filtrados)
+        
+        # Referencia: FFT + IFFT de la misma señal, medidas aparte (sin almacén ni disco)
+        inicio = time.perf_counter()
+        ifft(fft(datos))
+        tiempo_fourier = time.perf_counter() - inicio
+        print(f"   • Tiempo DWT: {1000 * tiempo_ondiculas:.1f} ms | "
+              f"FFT+IFFT: {1000 * tiempo_fourier:.1f} ms | "
+              f"Costo relativo: {tiempo_ondiculas / tiempo_fourier:.2f}x")
     else:
-        rango_tuple = (500, 1500)
-    
-    # Crear máscara
-    mascara = crear_mascara_filtro(frecuencias, args.filtro, args.corte, rango_tuple)
-    
-    # Aplicar filtro
-    espectro_filtrado = espectro * mascara
-    
-    # 4. Reconstruir señal
-    print(f"\n[4/6] Reconstruyendo señal con IFFT...")
-    datos_filtrados = np.real(ifft(espectro_filtrado))
+        # Crear máscara
+        if args.filtro == 'perfil':
+            # Resta espectral con el perfil de ruido aprendido (sin estimar ruido aquí)
+            perfil = perfiles_ruido.cargar_perfil(args.perfil_ruido)
+            print(f"   • Perfil: {args.perfil_ruido} ({perfil['fs']} Hz, nfft {perfil['nfft']}, "
+                  f"{len(perfil['picos_frecuencia'])} picos tonales)")
+            escala = perfiles_ruido.nivel_normalizacion(args.entrada)
+            mascara = perfiles_ruido.mascara_desde_perfil(perfil, espectro, frecuencias, fs, escala)
+        else:
+            mascara = crear_mascara_filtro(frecuencias, args.filtro, args.corte, rango_tuple)
+        
+        # Aplicar filtro
+        espectro_filtrado = espectro * mascara
+        
+        # 4. Reconstruir señal
+        print(f"\n[4/6] Reconstruyendo señal con IFFT...")
+        datos_filtrados = np.real(ifft(espectro_filtrado))
     
     # 5. Calcular métricas
     print(f"\n[5/6] Calculando métricas de calidad...")
@@ -311,6 +482,16 @@ def main():
     print(f"   • SNR: {metricas['snr_db']:.2f} dB")
     print(f"   • PSNR: {metricas['psnr_db']:.2f} dB")
     
+    # Métricas segmentales y espectrales (reutilizan los espectros ya calculados)
+    calidad = metricas_calidad.evaluar(datos, datos_filtrados, fs, espectro, espectro_filtrado)
+    print(f"   • SNR segmental: {calidad['snr_segmental_db']:.2f} dB")
+    print(f"   • LSD: {calidad['lsd_db']:.2f} dB (segmental: {calidad['lsd_segmental_db']:.2f} dB)")
+    bordes = calidad['bordes_bandas']
+    retencion = ' | '.join(f"{bordes[i]:.0f}-{bordes[i+1]:.0f}: {100 * r:.0f}%"
+                           for i, r in enumerate(calidad['retencion_bandas'])
+                           if not np.isnan(r))
+    print(f"   • Energía retenida por banda (Hz): {retencion}")
+    
     # Verificación de Parseval
     parseval_original = verificar_parseval(datos, espectro)
     parseval_filtrado = verificar_parseval(datos_filtrados, espectro_filtrado)
@@ -334,6 +515,10 @@ def main():
         nombre_archivo = f'resultados_completos_{args.filtro}'
         if args.filtro in ['pasa_bajas', 'pasa_altas']:
             nombre_archivo += f'_{args.corte}Hz'
+        elif args.filtro == 'ondiculas':
+            nombre_archivo += f'_{args.ondicula}_{args.niveles}niv_{args.umbral}'
+        elif args.filtro == 'perfil':
+            nombre_archivo += f'_{os.path.splitext(os.path.basename(args.perfil_ruido))[0]}'
         else:
             nombre_archivo += f'_{args.rango.replace("-", "_")}Hz'
         
@@ -352,6 +537,10 @@ def main():
     print(f"Filtro aplicado: {args.filtro}")
     if args.filtro in ['pasa_bajas', 'pasa_altas']:
         print(f"Frecuencia de corte: {args.corte} Hz")
+    elif args.filtro == 'ondiculas':
+        print(f"Ondícula: {args.ondicula} ({args.niveles} niveles, umbral {args.umbral})")
+    elif args.filtro == 'perfil':
+        print(f"Perfil de ruido: {args.perfil_ruido}")
     else:
         print(f"Rango de frecuencias: {rango_tuple[0]}-{rango_tuple[1]} Hz")
     print(f"MSE: {metricas['mse']:.6f}")
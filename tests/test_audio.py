@@ -0,0 +1,27 @@
+"""Síntesis por bloques de audios largos (audio.py)"""
+
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+import audio
+
+@pytest.mark.parametrize('tipo', audio.TIPOS_SENAL)
+def test_mismos_bytes_con_uno_o_varios_trabajadores(tmp_path, tipo):
+    rutas = [str(tmp_path / f'{tipo}_{n}.wav') for n in (1, 3)]
+    for ruta, trabajadores in zip(rutas, (1, 3)):
+        audio.generar_audio_largo(ruta, tipo, 440.0, duracion=1.0, fs=8000, canales=2,
+                                  semilla=5, trabajadores=trabajadores, tam_bloque=1000)
+
+    with open(rutas[0], 'rb') as a, open(rutas[1], 'rb') as b:
+        assert a.read() == b.read()
+
+def test_fase_continua_entre_bloques(tmp_path):
+    ruta = str(tmp_path / 'pura.wav')
+    info = audio.generar_audio_largo(ruta, 'pura', 440.0, duracion=1.0, fs=8000,
+                                     trabajadores=1, tam_bloque=777)
+    fs, datos = wavfile.read(ruta)
+
+    esperada = np.int16(np.sin(2 * np.pi * 440.0 * np.arange(8000) / fs) / info['maximo'] * 32767)
+    assert info['bloques'] == 11
+    assert np.max(np.abs(datos.astype(int) - esperada)) <= 1
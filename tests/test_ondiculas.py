@@ -0,0 +1,34 @@
+"""Transformada wavelet y denoising (ondiculas.py)"""
+
+import numpy as np
+import pytest
+
+import ondiculas
+
+@pytest.mark.parametrize('ondicula', sorted(ondiculas.ONDICULAS))
+def test_reconstruccion_perfecta_y_energia(ondicula):
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((2, 1024))
+
+    coeficientes = ondiculas.dwt(x, ondicula, niveles=4)
+    energia = sum(np.sum(c ** 2, axis=-1) for c in coeficientes)
+
+    np.testing.assert_allclose(ondiculas.idwt(coeficientes, ondicula), x, atol=1e-10)
+    np.testing.assert_allclose(energia, np.sum(x ** 2, axis=-1), rtol=1e-10)
+
+def test_eliminar_ruido_conserva_forma_y_reduce_ruido():
+    rng = np.random.default_rng(1)
+    t = np.arange(5000) / 8000
+    limpia = np.sin(2 * np.pi * 50 * t)
+    ruidosa = np.stack([limpia, limpia], axis=1) + 0.2 * rng.standard_normal((5000, 2))
+
+    resultado = ondiculas.eliminar_ruido(ruidosa, 'db4', niveles=5)
+
+    assert resultado['datos_filtrados'].shape == ruidosa.shape
+    error_antes = np.mean((ruidosa - limpia[:, None]) ** 2)
+    error_despues = np.mean((resultado['datos_filtrados'] - limpia[:, None]) ** 2)
+    assert error_despues < error_antes / 2
+
+def test_eliminar_ruido_rechaza_cero_niveles():
+    with pytest.raises(ValueError):
+        ondiculas.eliminar_ruido(np.zeros(64), niveles=0)
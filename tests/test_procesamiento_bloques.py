@@ -0,0 +1,51 @@
+"""Solapamiento-suma por bloques, en paralelo y en streaming (procesamiento_bloques.py, perfiles_ruido.py)"""
+
+import numpy as np
+import pytest
+
+import perfiles_ruido
+import procesamiento_bloques
+
+FS = 8000
+TAM_TRAMA = 512
+
+@pytest.fixture
+def senal():
+    rng = np.random.default_rng(0)
+    t = np.arange(3 * FS + 123) / FS
+    return 0.5 * np.sin(2 * np.pi * 440 * t) + 0.1 * rng.standard_normal(len(t))
+
+def _por_bloques(datos, **opciones):
+    opciones.setdefault('tam_trama', TAM_TRAMA)
+    salida = np.zeros(datos.shape, dtype=np.float32)
+    procesamiento_bloques.filtrar_por_bloques(datos, 1.0, salida, FS, **opciones)
+    return salida
+
+def test_mascara_identidad_reconstruye_la_entrada(senal):
+    salida = _por_bloques(senal, tipo_filtro='pasa_bajas', frecuencia_corte=FS)
+    np.testing.assert_allclose(salida, senal, atol=1e-6)
+
+def test_segmentado_paralelo_igual_a_bloques(senal):
+    estereo = np.stack([senal, senal[::-1]], axis=1)
+    paralela = np.zeros(estereo.shape, dtype=np.float32)
+    procesamiento_bloques.filtrar_segmentado_paralelo(estereo, 1.0, paralela, FS, 'pasa_bajas',
+                                                      1000, tam_trama=TAM_TRAMA, hilos=4)
+    np.testing.assert_array_equal(paralela, _por_bloques(estereo, frecuencia_corte=1000))
+
+def test_streaming_igual_a_bloques_con_perfil(senal):
+    perfil = perfiles_ruido.aprender_perfil(0.1 * np.random.default_rng(1).standard_normal(FS),
+                                            FS, nfft=TAM_TRAMA)
+    suma_w2 = np.sum(procesamiento_bloques.ventana_hann_periodica(TAM_TRAMA) ** 2)
+    ganancia = perfiles_ruido.crear_funcion_ganancia(perfil, FS, TAM_TRAMA, suma_w2)
+    bloques = _por_bloques(senal, funcion_ganancia=ganancia)
+
+    filtro = perfiles_ruido.FiltroStreaming(perfil, FS, TAM_TRAMA)
+    partes = [filtro.procesar(senal[i:i + 700]) for i in range(0, len(senal), 700)]
+    streaming = np.concatenate(partes + [filtro.finalizar()])
+
+    assert len(streaming) == len(senal)
+    np.testing.assert_allclose(streaming, bloques, atol=1e-6)
+
+def test_tam_trama_impar_se_rechaza(senal):
+    with pytest.raises(ValueError):
+        _por_bloques(senal[:1000], tam_trama=TAM_TRAMA + 1)
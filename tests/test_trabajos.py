@@ -0,0 +1,91 @@
+"""Reanudación de trabajos interrumpidos (trabajos.py)"""
+
+import os
+
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+import canalizacion
+import trabajos
+
+def _crear_corpus(carpeta, cantidad, primero=0):
+    """Archivos .wav cortos con un tono distinto cada uno"""
+    os.makedirs(carpeta, exist_ok=True)
+    t = np.arange(4410) / 44100
+    rutas = []
+    for i in range(primero, primero + cantidad):
+        ruta = os.path.join(carpeta, f'senal_{i}.wav')
+        wavfile.write(ruta, 44100, np.int16(0.5 * np.sin(2 * np.pi * 200 * (i + 1) * t) * 32767))
+        rutas.append(ruta)
+    return rutas
+
+def _interrumpir_tras(monkeypatch, terminados):
+    """Hace que la canalización procese 'terminados' archivos y luego se interrumpa"""
+    original = canalizacion.ejecutar_canalizacion
+
+    def interrumpida(tareas, *args, **kwargs):
+        original(tareas[:terminados], *args, **kwargs)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(canalizacion, 'ejecutar_canalizacion', interrumpida)
+
+def _procesados_en(monkeypatch):
+    """Registra las tareas que llegan a la canalización"""
+    procesados = []
+    original = canalizacion.ejecutar_canalizacion
+
+    def registrada(tareas, *args, **kwargs):
+        procesados.extend(tareas)
+        return original(tareas, *args, **kwargs)
+
+    monkeypatch.setattr(canalizacion, 'ejecutar_canalizacion', registrada)
+    return procesados
+
+def test_reanuda_primera_ejecucion_interrumpida(tmp_path, monkeypatch):
+    archivos = _crear_corpus(str(tmp_path / 'entrada'), 4)
+    salida_dir = str(tmp_path / 'salida')
+
+    _interrumpir_tras(monkeypatch, 2)
+    with pytest.raises(KeyboardInterrupt):
+        trabajos.ejecutar_trabajo(archivos, salida_dir, intervalo_reporte=0)
+
+    monkeypatch.undo()
+    procesados = _procesados_en(monkeypatch)
+    manifiesto = trabajos.ejecutar_trabajo(archivos, salida_dir, intervalo_reporte=0)
+
+    assert procesados == archivos[2:]
+    assert all(info['estado'] == trabajos.ESTADO_COMPLETO
+               for info in manifiesto.archivos.values())
+    assert not os.path.exists(manifiesto.ruta_bitacora)
+
+def test_reanuda_archivos_agregados_al_corpus(tmp_path, monkeypatch):
+    carpeta = str(tmp_path / 'entrada')
+    salida_dir = str(tmp_path / 'salida')
+    anteriores = _crear_corpus(carpeta, 2)
+    trabajos.ejecutar_trabajo(anteriores, salida_dir, intervalo_reporte=0)
+
+    nuevos = _crear_corpus(carpeta, 3, primero=2)
+    _interrumpir_tras(monkeypatch, 1)
+    with pytest.raises(KeyboardInterrupt):
+        trabajos.ejecutar_trabajo(anteriores + nuevos, salida_dir, intervalo_reporte=0)
+
+    monkeypatch.undo()
+    procesados = _procesados_en(monkeypatch)
+    trabajos.ejecutar_trabajo(anteriores + nuevos, salida_dir, intervalo_reporte=0)
+
+    assert procesados == nuevos[1:]
+
+def test_salida_sigue_la_raiz_del_corpus_actual(tmp_path, monkeypatch):
+    salida_dir = str(tmp_path / 'salida')
+    primero = _crear_corpus(str(tmp_path / 'A'), 1)
+    trabajos.ejecutar_trabajo(primero, salida_dir, intervalo_reporte=0)
+
+    # Con otra carpeta en el corpus la raíz común cambia y con ella la salida
+    archivos = primero + _crear_corpus(str(tmp_path / 'B'), 1)
+    manifiesto = trabajos.ejecutar_trabajo(archivos, salida_dir, intervalo_reporte=0)
+    assert manifiesto.archivos[primero[0]]['salida'].startswith(os.path.join(salida_dir, 'A'))
+
+    procesados = _procesados_en(monkeypatch)
+    trabajos.ejecutar_trabajo(archivos, salida_dir, intervalo_reporte=0)
+    assert procesados == []
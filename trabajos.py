@@ -0,0 +1,311 @@
+"""
+TRABAJOS REANUDABLES SOBRE UN CORPUS DE AUDIOS
+Procesa muchos archivos con puntos de control, progreso y ETA
+
+Si un trabajo largo se interrumpe, al volver a ejecutarlo continúa donde se quedó:
+- manifiesto.json: configuración del filtro y estado de cada archivo
+- bitacora.jsonl: una línea por archivo terminado (se agrega al instante,
+  sin reescribir el manifiesto completo en cada archivo)
+
+Al iniciar se aplica la bitácora sobre el manifiesto y se compacta. Los
+archivos del corpus se registran en el manifiesto en disco antes de procesar
+el primero, para que una interrupción en la primera ejecución sea reanudable.
+Un archivo se omite si ya está 'completo', su salida existe y es más reciente
+que la entrada, y la configuración del filtro no cambió.
+
+Durante la ejecución se reporta:
+- Rendimiento en archivos/s y segundos de audio/s
+- Tiempo estimado restante (ETA)
+- Lista de fallos, que se reintentan hasta --reintentos veces
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import threading
+
+import procesar
+import canalizacion
+
+ESTADO_PENDIENTE = 'pendiente'
+ESTADO_COMPLETO = 'completo'
+ESTADO_FALLIDO = 'fallido'
+
+def buscar_archivos(entradas):
+    """
+    Expande carpetas y patrones en una lista ordenada de archivos .wav
+
+    Args:
+        entradas: Lista de archivos, carpetas o patrones glob
+
+    Returns:
+        list: Rutas de archivos .wav sin duplicados
+    """
+    archivos = set()
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            archivos.update(glob.glob(os.path.join(entrada, '**', '*.wav'), recursive=True))
+        else:
+            archivos.update(glob.glob(entrada) or [entrada])
+    return sorted(os.path.normpath(a) for a in archivos)
+
+class Manifiesto:
+    """Estado persistente de un trabajo (manifiesto + bitácora de avances)"""
+
+    def __init__(self, carpeta, configuracion):
+        self.ruta = os.path.join(carpeta, 'manifiesto.json')
+        self.ruta_bitacora = os.path.join(carpeta, 'bitacora.jsonl')
+        self.configuracion = configuracion
+        self.archivos = {}
+        self._candado = threading.Lock()
+        self._bitacora = None
+        os.makedirs(carpeta, exist_ok=True)
+        self._cargar()
+
+    @staticmethod
+    def _entrada_nueva(salida):
+        """Estado inicial de un archivo del corpus"""
+        return {'estado': ESTADO_PENDIENTE, 'salida': salida, 'intentos': 0,
+                'error': None, 'duracion_s': None}
+
+    def _cargar(self):
+        """Lee el manifiesto y aplica los avances registrados en la bitácora"""
+        misma_configuracion = True
+        if os.path.exists(self.ruta):
+            with open(self.ruta, 'r') as f:
+                guardado = json.load(f)
+            if guardado.get('configuracion') == self.configuracion:
+                self.archivos = guardado.get('archivos', {})
+            else:
+                misma_configuracion = False
+                print("[INFO] La configuración cambió: se reprocesa todo el corpus")
+
+        if misma_configuracion and os.path.exists(self.ruta_bitacora):
+            with open(self.ruta_bitacora, 'r') as f:
+                for linea in f:
+                    try:
+                        registro = json.loads(linea)
+                    except ValueError:
+                        continue  # Línea incompleta por una interrupción
+                    # Un archivo puede no estar en el manifiesto si se interrumpió
+                    # antes de compactar: se crea su entrada en lugar de perder el avance
+                    info = self.archivos.setdefault(registro['entrada'],
+                                                    self._entrada_nueva(None))
+                    info.update(registro['cambios'])
+
+        self.compactar()
+
+    def compactar(self):
+        """Reescribe el manifiesto completo y vacía la bitácora"""
+        with self._candado:
+            if self._bitacora is not None:
+                self._bitacora.close()
+                self._bitacora = None
+            ruta_tmp = self.ruta + '.tmp'
+            with open(ruta_tmp, 'w') as f:
+                json.dump({'configuracion': self.configuracion,
+                           'archivos': self.archivos}, f, indent=1)
+            os.replace(ruta_tmp, self.ruta)
+            if os.path.exists(self.ruta_bitacora):
+                os.remove(self.ruta_bitacora)
+
+    def registrar(self, entrada, salida):
+        """Agrega un archivo al manifiesto si aún no existe (ver compactar)"""
+        info = self.archivos.setdefault(entrada, self._entrada_nueva(salida))
+        # La salida depende de la raíz común del corpus actual (o viene vacía
+        # si la entrada se recuperó solo de la bitácora): usar siempre la vigente
+        info['salida'] = salida
+
+    def actualizar(self, entrada, **cambios):
+        """Actualiza el estado de un archivo y lo agrega a la bitácora"""
+        with self._candado:
+            self.archivos[entrada].update(cambios)
+            if self._bitacora is None:
+                self._bitacora = open(self.ruta_bitacora, 'a')
+            self._bitacora.write(json.dumps({'entrada': entrada, 'cambios': cambios}) + '\n')
+            self._bitacora.flush()
+
+    def esta_al_dia(self, entrada):
+        """True si el archivo ya se procesó y su salida es más reciente que la entrada"""
+        info = self.archivos[entrada]
+        if info['estado'] != ESTADO_COMPLETO or not os.path.exists(info['salida']):
+            return False
+        return os.path.getmtime(info['salida']) >= os.path.getmtime(entrada)
+
+class Progreso:
+    """Calcula rendimiento y ETA a partir de los archivos terminados"""
+
+    def __init__(self, total):
+        self.total = total
+        self.terminados = 0
+        self.fallidos = 0
+        self.segundos_audio = 0.0
+        self.inicio = time.perf_counter()
+        self._candado = threading.Lock()
+
+    def avanzar(self, segundos_audio=0.0, fallo=False):
+        with self._candado:
+            self.terminados += 1
+            self.fallidos += int(fallo)
+            self.segundos_audio += segundos_audio
+
+    def resumen(self):
+        """Texto con avance, archivos/s, audio-s/s y ETA"""
+        transcurrido = max(time.perf_counter() - self.inicio, 1e-9)
+        archivos_s = self.terminados / transcurrido
+        audio_s = self.segundos_audio / transcurrido
+        restantes = self.total - self.terminados
+        eta = restantes / archivos_s if archivos_s > 0 else float('inf')
+        return (f"[{self.terminados}/{self.total}] {archivos_s:.2f} archivos/s | "
+                f"{audio_s:.1f} s audio/s | ETA {formatear_tiempo(eta)} | "
+                f"fallos {self.fallidos}")
+
+def formatear_tiempo(segundos):
+    """Formatea segundos como hh:mm:ss"""
+    if segundos == float('inf'):
+        return '--:--:--'
+    segundos = int(round(segundos))
+    return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}"
+
+def ejecutar_trabajo(archivos, salida_dir, tipo_filtro='pasa_bajas', frecuencia_corte=1000,
+                     rango_frecuencias=(500, 1500), reintentos=2, raiz=None,
+                     intervalo_reporte=2.0, profundidad=2, hilos_lectura=1, hilos_escritura=1):
+    """
+    Filtra un corpus con puntos de control, reintentos y reporte de progreso
+
+    Args:
+        archivos: Lista de rutas .wav
+        salida_dir: Carpeta de salida (también guarda el manifiesto)
+        tipo_filtro: Tipo de filtro (ver procesar.crear_mascara_filtro)
+        frecuencia_corte: Frecuencia de corte para pasa_bajas/pasa_altas
+        rango_frecuencias: Tupla (min, max) para pasa_banda/notch
+        reintentos: Rondas adicionales para los archivos que fallaron
+        raiz: Carpeta base para conservar la estructura de subcarpetas en la salida
+        intervalo_reporte: Segundos mínimos entre líneas de progreso
+        profundidad, hilos_lectura, hilos_escritura: Ver canalizacion.ejecutar_canalizacion
+
+    Returns:
+        Manifiesto: Estado final del trabajo
+    """
+    configuracion = {'filtro': tipo_filtro, 'corte': frecuencia_corte,
+                     'rango': list(rango_frecuencias)}
+    manifiesto = Manifiesto(salida_dir, configuracion)
+
+    if raiz is None and archivos:
+        raiz = os.path.commonpath([os.path.abspath(os.path.dirname(a)) for a in archivos])
+
+    def ruta_salida(entrada):
+        relativa = os.path.relpath(os.path.abspath(entrada), raiz)
+        base = os.path.splitext(relativa)[0]
+        return os.path.join(salida_dir, f'{base}_{tipo_filtro}.wav')
+
+    for entrada in archivos:
+        manifiesto.registrar(entrada, ruta_salida(entrada))
+    manifiesto.compactar()  # Persistir el corpus antes de procesar el primer archivo
+
+    leer, calcular, escribir_base = canalizacion.crear_etapas_filtrado(
+        salida_dir, tipo_filtro, frecuencia_corte, rango_frecuencias, ruta_salida)
+
+    duraciones = {}
+
+    def escribir(entrada, resultado):
+        fs, datos_filtrados, _ = resultado
+        os.makedirs(os.path.dirname(ruta_salida(entrada)), exist_ok=True)
+        escribir_base(entrada, resultado)
+        duraciones[entrada] = len(datos_filtrados) / fs
+
+    omitidos = [a for a in archivos if manifiesto.esta_al_dia(a)]
+    pendientes = [a for a in archivos if not manifiesto.esta_al_dia(a)]
+    print(f"Archivos: {len(archivos)} | Al día (se omiten): {len(omitidos)} | "
+          f"Por procesar: {len(pendientes)}")
+
+    for ronda in range(reintentos + 1):
+        if not pendientes:
+            break
+        if ronda > 0:
+            print(f"\n[REINTENTO {ronda}/{reintentos}] {len(pendientes)} archivo(s) fallido(s)")
+
+        progreso = Progreso(len(pendientes))
+        ultimo_reporte = [0.0]
+
+        def al_terminar(entrada, error):
+            intentos = manifiesto.archivos[entrada]['intentos'] + 1
+            if error is None:
+                manifiesto.actualizar(entrada, estado=ESTADO_COMPLETO, intentos=intentos,
+                                      error=None, duracion_s=duraciones.get(entrada))
+            else:
+                manifiesto.actualizar(entrada, estado=ESTADO_FALLIDO, intentos=intentos,
+                                      error=str(error))
+            progreso.avanzar(duraciones.get(entrada, 0.0), fallo=error is not None)
+
+            ahora = time.perf_counter()
+            if ahora - ultimo_reporte[0] >= intervalo_reporte or progreso.terminados == progreso.total:
+                ultimo_reporte[0] = ahora
+                print(f"   {progreso.resumen()}")
+
+        canalizacion.ejecutar_canalizacion(pendientes, leer, calcular, escribir, profundidad,
+                                           hilos_lectura, hilos_escritura, al_terminar)
+
+        pendientes = [a for a in pendientes
+                      if manifiesto.archivos[a]['estado'] == ESTADO_FALLIDO]
+
+    manifiesto.compactar()
+    return manifiesto
+
+def main():
+    """Ejecuta (o reanuda) un trabajo de denoising sobre un corpus"""
+    parser = argparse.ArgumentParser(description='Denoising reanudable sobre un corpus')
+
+    parser.add_argument('--entradas', type=str, nargs='+', required=True,
+                       help='Archivos, carpetas o patrones glob de entrada')
+    parser.add_argument('--salida-dir', type=str, default='resultados/audios_procesados/corpus',
+                       help='Carpeta de salida y del manifiesto del trabajo')
+    parser.add_argument('--filtro', type=str, default='pasa_bajas',
+                       choices=['pasa_bajas', 'pasa_altas', 'pasa_banda', 'notch'],
+                       help='Tipo de filtro a aplicar')
+    parser.add_argument('--corte', type=float, default=1000.0,
+                       help='Frecuencia de corte para pasa_bajas/pasa_altas')
+    parser.add_argument('--rango', type=str, default='500-1500',
+                       help='Rango para pasa_banda/notch (formato: min-max)')
+    parser.add_argument('--reintentos', type=int, default=2,
+                       help='Rondas de reintento para archivos fallidos')
+    parser.add_argument('--intervalo', type=float, default=2.0,
+                       help='Segundos entre reportes de progreso')
+
+    args = parser.parse_args()
+
+    archivos = buscar_archivos(args.entradas)
+    if not archivos:
+        print("ERROR: No se encontraron archivos .wav")
+        sys.exit(1)
+
+    print("="*60)
+    print("TRABAJO REANUDABLE DE DENOISING")
+    print("="*60)
+
+    manifiesto = ejecutar_trabajo(archivos, args.salida_dir, args.filtro, args.corte,
+                                  procesar.parsear_rango(args.rango), args.reintentos,
+                                  intervalo_reporte=args.intervalo)
+
+    fallidos = {e: i for e, i in manifiesto.archivos.items() if i['estado'] == ESTADO_FALLIDO}
+    completos = sum(1 for i in manifiesto.archivos.values() if i['estado'] == ESTADO_COMPLETO)
+
+    print("\n" + "="*60)
+    print("RESUMEN DEL TRABAJO")
+    print("="*60)
+    print(f"Completos: {completos}/{len(manifiesto.archivos)}")
+    print(f"Manifiesto: {manifiesto.ruta}")
+    if fallidos:
+        print(f"Fallidos ({len(fallidos)}):")
+        for entrada, info in fallidos.items():
+            print(f"  - {entrada} ({info['intentos']} intentos): {info['error']}")
+    print("="*60)
+
+    if fallidos:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()